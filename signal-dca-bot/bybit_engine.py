@@ -12,11 +12,17 @@ Handles:
 
 import logging
 import time
+from itertools import islice
 from config import BotConfig
 from trade_manager import Trade
 
 logger = logging.getLogger(__name__)
 
+# Keep-alive pool size for pybit's requests.Session. Default is 10; concurrent
+# to_thread calls (e.g. trend-switch closes) would otherwise open and discard
+# extra connections ("Connection pool is full") → new TLS handshake each time.
+HTTP_POOL_SIZE = 20
+
 
 class BybitEngine:
     """Handles all Bybit API interactions."""
@@ -37,12 +43,17 @@ class BybitEngine:
         """Initialize pybit HTTP session."""
         try:
             from pybit.unified_trading import HTTP
+            from requests.adapters import HTTPAdapter
 
             self._session = HTTP(
                 testnet=self.config.bybit_testnet,
                 api_key=self.config.bybit_api_key,
                 api_secret=self.config.bybit_api_secret,
             )
+            # pybit reuses one requests.Session (keep-alive) → just widen its pool
+            client = getattr(self._session, "client", None)
+            if client is not None:
+                client.mount("https://", HTTPAdapter(pool_maxsize=HTTP_POOL_SIZE))
             logger.info(
                 f"Bybit connected ({'TESTNET' if self.config.bybit_testnet else 'LIVE'})"
             )
@@ -308,11 +319,7 @@ class BybitEngine:
         min_qty = info["min_qty"]
         pos_idx = self._position_idx(trade.side)
 
-        for i in range(1, trade.max_dca + 1):
-            if i >= len(trade.dca_levels):
-                break
-
-            dca = trade.dca_levels[i]
+        for i, dca in enumerate(islice(trade.dca_levels, 1, None), 1):
             dca_qty = self.round_qty(dca.qty, qty_step)
             dca_price = self.round_price(dca.price, tick_size)
 
@@ -449,7 +456,6 @@ class BybitEngine:
             )
 
             order_id = result["result"]["orderId"]
-            trade.tp_order_id = order_id
             logger.info(f"Partial close: {trade.symbol} {qty} | {reason} | Order: {order_id}")
             return True
 
@@ -457,7 +463,7 @@ class BybitEngine:
             logger.error(f"Partial close failed for {trade.symbol}: {e}")
             return False
 
-    def close_full(self, trade: Trade, reason: str) -> bool:
+    def close_full(self, trade: Trade, reason: str, cancel_orders: bool = True) -> bool:
         """Close entire remaining position with exchange verification.
 
         1. Cancel ALL orders for the symbol first
@@ -468,9 +474,12 @@ class BybitEngine:
         Args:
             trade: The trade
             reason: For logging
+            cancel_orders: False if the caller already cancelled all orders
+                for the symbol (batch close of several trades on one symbol)
         """
         # Step 1: Cancel ALL open orders (TPs, DCAs, E1)
-        self.cancel_all_orders(trade.symbol)
+        if cancel_orders:
+            self.cancel_all_orders(trade.symbol)
 
         # Step 2: Get actual position from exchange (source of truth)
         import time
@@ -716,27 +725,66 @@ class BybitEngine:
                 kwargs["startTime"] = start_time_ms
 
             result = self.session.get_closed_pnl(**kwargs)
-            records = []
-            for r in result["result"]["list"]:
-                # INVERT: Buy closing order = short position, Sell = long
-                position_side = "short" if r["side"] == "Buy" else "long"
-                records.append({
-                    "symbol": r["symbol"],
-                    "side": position_side,
-                    "qty": float(r["qty"]),
-                    "entry_price": float(r["avgEntryPrice"]),
-                    "exit_price": float(r["avgExitPrice"]),
-                    "closed_pnl": float(r["closedPnl"]),
-                    "order_type": r["orderType"],
-                    "leverage": r.get("leverage", ""),
-                    "created_time": int(r["createdTime"]) / 1000,  # ms → seconds
-                    "updated_time": int(r["updatedTime"]) / 1000,
-                })
-            return records
+            return [self._parse_closed_pnl(r) for r in result["result"]["list"]]
         except Exception as e:
             logger.error(f"Get closed PnL failed: {e}")
             return []
 
+    def get_closed_pnl_all(
+        self, start_time_ms: int, max_pages: int = 10
+    ) -> list[dict] | None:
+        """Get ALL closed PnL records since start_time_ms (cursor-paginated).
+
+        One request per 100 records instead of one request per trade
+        (used by admin fix-pnl). Same record format as get_closed_pnl().
+        Returns None if a page fails or more than max_pages pages exist —
+        callers must not act on a partial result.
+        """
+        records = []
+        cursor = ""
+        try:
+            for _ in range(max_pages):
+                kwargs = {
+                    "category": "linear",
+                    "limit": 100,
+                    "startTime": start_time_ms,
+                }
+                if cursor:
+                    kwargs["cursor"] = cursor
+                result = self.session.get_closed_pnl(**kwargs)
+                records.extend(
+                    self._parse_closed_pnl(r) for r in result["result"]["list"]
+                )
+                cursor = result["result"].get("nextPageCursor", "")
+                if not cursor:
+                    return records
+        except Exception as e:
+            logger.error(f"Get closed PnL (paginated) failed: {e}")
+            return None
+        logger.error(
+            f"Get closed PnL (paginated) truncated: more than "
+            f"{max_pages * 100} records since {start_time_ms}"
+        )
+        return None
+
+    @staticmethod
+    def _parse_closed_pnl(r: dict) -> dict:
+        """Bybit closed PnL entry → our record format."""
+        # INVERT: Buy closing order = short position, Sell = long
+        position_side = "short" if r["side"] == "Buy" else "long"
+        return {
+            "symbol": r["symbol"],
+            "side": position_side,
+            "qty": float(r["qty"]),
+            "entry_price": float(r["avgEntryPrice"]),
+            "exit_price": float(r["avgExitPrice"]),
+            "closed_pnl": float(r["closedPnl"]),
+            "order_type": r["orderType"],
+            "leverage": r.get("leverage", ""),
+            "created_time": int(r["createdTime"]) / 1000,  # ms → seconds
+            "updated_time": int(r["updatedTime"]) / 1000,
+        }
+
     def get_klines(self, symbol: str, interval: str = "15", limit: int = 100) -> list[dict]:
         """Fetch OHLC candles from Bybit.
 
@@ -820,6 +868,50 @@ class BybitEngine:
     # ▌ EXCHANGE-SIDE TP / SL / TRAILING
     # ══════════════════════════════════════════════════════════════════════
 
+    def _build_tp_order(self, trade: Trade, tp_num: int, tp_price: float,
+                        qty: float, tag: str, info: dict) -> dict | None:
+        """Round + validate one TP → reduceOnly limit request (no category).
+
+        Shared by place_tp_order() and place_tp_orders(); None if the
+        rounded qty/price is not placeable.
+        """
+        tp_price = self.round_price(tp_price, info["tick_size"])
+        qty = self.round_qty(qty, info["qty_step"])
+
+        if qty < info["min_qty"]:
+            logger.warning(f"TP{tp_num} qty too small: {qty} for {trade.symbol}")
+            return None
+
+        if tp_price <= 0:
+            logger.warning(f"TP{tp_num} price rounded to 0 for {trade.symbol}")
+            return None
+
+        return {
+            "symbol": trade.symbol,
+            "side": "Sell" if trade.side == "long" else "Buy",
+            "orderType": "Limit",
+            "qty": str(qty),
+            "price": str(tp_price),
+            "timeInForce": "GTC",
+            "reduceOnly": True,
+            "orderLinkId": f"{trade.trade_id}_{tag}{tp_num}",
+            **self._position_idx(trade.side),
+        }
+
+    def _submit_tp_order(self, trade: Trade, tp_num: int, order: dict) -> str | None:
+        """Place one request built by _build_tp_order(). Returns order_id."""
+        try:
+            result = self.session.place_order(category="linear", **order)
+            order_id = result["result"]["orderId"]
+            logger.info(
+                f"TP{tp_num} placed: {trade.symbol} {order['side']} "
+                f"{order['qty']} @ {order['price']} | Order: {order_id}"
+            )
+            return order_id
+        except Exception as e:
+            logger.error(f"TP{tp_num} order failed for {trade.symbol}: {e}")
+            return None
+
     def place_tp_order(self, trade: Trade, tp_price: float, qty: float,
                        tp_num: int = 1, tag: str = "TP") -> str | None:
         """Place TP as reduceOnly limit order on Bybit.
@@ -837,42 +929,65 @@ class BybitEngine:
         if not info:
             return None
 
-        tp_price = self.round_price(tp_price, info["tick_size"])
-        qty = self.round_qty(qty, info["qty_step"])
-
-        if qty < info["min_qty"]:
-            logger.warning(f"TP{tp_num} qty too small: {qty} for {trade.symbol}")
+        order = self._build_tp_order(trade, tp_num, tp_price, qty, tag, info)
+        if order is None:
             return None
+        return self._submit_tp_order(trade, tp_num, order)
 
-        if tp_price <= 0:
-            logger.warning(f"TP{tp_num} price rounded to 0 for {trade.symbol}")
-            return None
+    def place_tp_orders(self, trade: Trade, tps: list[tuple[int, float, float]],
+                        tag: str = "TP") -> dict[int, str]:
+        """Place several TPs as reduceOnly limits in one create-batch request.
 
-        close_side = "Sell" if trade.side == "long" else "Buy"
-        pos_idx = self._position_idx(trade.side)
+        Args:
+            trade: The trade
+            tps: (tp_num, tp_price, qty) per TP
+            tag: OrderLinkId tag ("TP" for E1, "DTP" for DCA)
+
+        Returns tp_num → order_id for every accepted TP. If the batch call
+        itself fails, falls back to one place_order per TP (orderLinkIds
+        are unique, so a partially applied batch can't duplicate).
+        """
+        info = self.get_instrument_info(trade.symbol)
+        if not info:
+            return {}
+
+        requests, nums = [], []
+        for tp_num, tp_price, qty in tps:
+            order = self._build_tp_order(trade, tp_num, tp_price, qty, tag, info)
+            if order is not None:
+                requests.append(order)
+                nums.append(tp_num)
+
+        if not requests:
+            return {}
 
         try:
-            result = self.session.place_order(
-                category="linear",
-                symbol=trade.symbol,
-                side=close_side,
-                orderType="Limit",
-                qty=str(qty),
-                price=str(tp_price),
-                timeInForce="GTC",
-                reduceOnly=True,
-                orderLinkId=f"{trade.trade_id}_{tag}{tp_num}",
-                **pos_idx,
-            )
-            order_id = result["result"]["orderId"]
-            logger.info(
-                f"TP{tp_num} placed: {trade.symbol} {close_side} {qty} @ {tp_price} | "
-                f"Order: {order_id}"
-            )
-            return order_id
+            result = self.session.place_batch_order(category="linear", request=requests)
         except Exception as e:
-            logger.error(f"TP{tp_num} order failed for {trade.symbol}: {e}")
-            return None
+            logger.error(f"TP batch failed for {trade.symbol}: {e} → placing one by one")
+            placed = {}
+            for tp_num, order in zip(nums, requests):
+                order_id = self._submit_tp_order(trade, tp_num, order)
+                if order_id:
+                    placed[tp_num] = order_id
+            return placed
+
+        # result.list and retExtInfo.list are in request order
+        acks = result["result"]["list"]
+        codes = result.get("retExtInfo", {}).get("list", [])
+        placed = {}
+        for k, (tp_num, ack) in enumerate(zip(nums, acks)):
+            code = codes[k] if k < len(codes) else {}
+            order_id = ack.get("orderId")
+            if code.get("code", 0) == 0 and order_id:
+                placed[tp_num] = order_id
+                logger.info(
+                    f"TP{tp_num} placed: {trade.symbol} {requests[k]['side']} "
+                    f"{requests[k]['qty']} @ {requests[k]['price']} | Order: {order_id}"
+                )
+            else:
+                logger.error(f"TP{tp_num} order failed for {trade.symbol}: {code.get('msg')}")
+        return placed
 
     def set_trading_stop(self, symbol: str, trade_side: str,
                          stop_loss: float = 0, trailing_stop: float = 0,
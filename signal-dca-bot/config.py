@@ -113,13 +113,14 @@ class BotConfig:
     # ── Filters ──
     min_leverage_signal: int = 0    # Skip signals below this leverage
     max_leverage_signal: int = 100  # Skip signals above this leverage
-    allowed_coins: list[str] = field(default_factory=list)  # Empty = all coins
-    blocked_coins: list[str] = field(default_factory=list)
+    allowed_coins: frozenset[str] = frozenset()  # Empty = all coins
+    blocked_coins: frozenset[str] = frozenset()
 
     # ── Server ──
     host: str = "0.0.0.0"
     port: int = 8000
     log_level: str = "INFO"
+    closed_history_size: int = 100  # Recent closed trades kept in memory (full history lives in DB)
 
     # ── Notifications ──
     telegram_notify_chat_id: str = ""  # Chat ID for bot notifications
@@ -128,6 +129,36 @@ class BotConfig:
     # ── Database (Railway PostgreSQL) ──
     database_url: str = ""  # Set automatically by Railway when you add PostgreSQL
 
+    # ── Derived (set in __post_init__, not configurable) ──
+    be_buffer_frac: float = field(init=False, repr=False)          # be_buffer_pct / 100
+    trailing_callback_frac: float = field(init=False, repr=False)  # trailing_callback_pct / 100
+    dca_quick_trail_trigger_frac: float = field(init=False, repr=False)  # per-tick check
+    dca_quick_trail_buffer_frac: float = field(init=False, repr=False)
+    dca_be_buffer_frac: float = field(init=False, repr=False)
+    dca_trail_callback_frac: float = field(init=False, repr=False)
+    safety_sl_frac: float = field(init=False, repr=False)
+    hard_sl_frac: float = field(init=False, repr=False)
+    # Per-level DCA price factors incl. limit buffer: dca_price = entry * factor[level]
+    dca_long_factors: tuple[float, ...] = field(init=False, repr=False)
+    dca_short_factors: tuple[float, ...] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        # Coin filters are membership-checked per signal → O(1) sets
+        self.allowed_coins = frozenset(self.allowed_coins)
+        self.blocked_coins = frozenset(self.blocked_coins)
+        self.be_buffer_frac = self.be_buffer_pct / 100
+        self.trailing_callback_frac = self.trailing_callback_pct / 100
+        self.dca_quick_trail_trigger_frac = self.dca_quick_trail_trigger_pct / 100
+        self.dca_quick_trail_buffer_frac = self.dca_quick_trail_buffer_pct / 100
+        self.dca_be_buffer_frac = self.dca_be_buffer_pct / 100
+        self.dca_trail_callback_frac = self.dca_trail_callback_pct / 100
+        self.safety_sl_frac = self.safety_sl_pct / 100
+        self.hard_sl_frac = self.hard_sl_pct / 100
+        buf = self.dca_limit_buffer_pct / 100
+        spacing = self.dca_spacing_pct[1:]
+        self.dca_long_factors = (1.0, *((1 - p / 100) * (1 - buf) for p in spacing))
+        self.dca_short_factors = (1.0, *((1 + p / 100) * (1 + buf) for p in spacing))
+
     @property
     def sum_multipliers(self) -> float:
         """Sum of all DCA multipliers used."""
@@ -156,14 +187,8 @@ class BotConfig:
         compensating for 1-candle lag from NEOCloud zone data.
         Long: 0.2% lower, Short: 0.2% higher.
         """
-        if level == 0:
-            return entry_price
-        pct = self.dca_spacing_pct[level] / 100
-        buf = self.dca_limit_buffer_pct / 100
-        if side == "long":
-            return entry_price * (1 - pct) * (1 - buf)
-        else:
-            return entry_price * (1 + pct) * (1 + buf)
+        factors = self.dca_long_factors if side == "long" else self.dca_short_factors
+        return entry_price * factors[level]
 
     def print_summary(self, equity: float = 2400):
         """Print configuration summary with example equity."""
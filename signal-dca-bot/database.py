@@ -15,10 +15,13 @@ Tables:
 import logging
 import os
 import time
+from contextlib import contextmanager
 from datetime import datetime, date, timezone
 from pathlib import Path
 from typing import Optional
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
 # Global connection
@@ -36,16 +39,32 @@ def get_connection():
         except Exception:
             _conn = None
 
+    _conn = open_connection()
+    if _conn is not None:
+        logger.info("PostgreSQL connected")
+    return _conn
+
+
+def is_configured() -> bool:
+    """True if a DATABASE_URL is set (persistence expected)."""
+    return bool(os.getenv("DATABASE_URL", ""))
+
+
+def open_connection():
+    """Open a new autocommit PostgreSQL connection (None without DB).
+
+    get_connection() shares one connection on the event loop thread;
+    background threads (trade writer) open their own with this.
+    """
     db_url = os.getenv("DATABASE_URL", "")
     if not db_url:
         return None
 
     try:
         import psycopg2
-        _conn = psycopg2.connect(db_url)
-        _conn.autocommit = True
-        logger.info("PostgreSQL connected")
-        return _conn
+        conn = psycopg2.connect(db_url)
+        conn.autocommit = True
+        return conn
     except ImportError:
         logger.warning("psycopg2 not installed, running without DB")
         return None
@@ -54,6 +73,32 @@ def get_connection():
         return None
 
 
+@contextmanager
+def transaction(conn=None):
+    """Run several statements in one transaction (one commit).
+
+    The shared connection (or the given one) is autocommit; this switches
+    it off for the duration of the block. Yields a cursor, or None without a DB.
+    """
+    if conn is None:
+        conn = get_connection()
+    if not conn:
+        yield None
+        return
+
+    conn.autocommit = False
+    cur = conn.cursor()
+    try:
+        yield cur
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.autocommit = True
+
+
 def init_tables():
     """Initialize database from schema.sql."""
     conn = get_connection()
@@ -291,6 +336,53 @@ def get_all_neo_cloud() -> dict[str, str]:
 # ▌ TRADE HISTORY
 # ══════════════════════════════════════════════════════════════════════════
 
+_SAVE_TRADE_SQL = """
+    INSERT INTO trades
+        (trade_id, symbol, side, entry_price, avg_price, close_price,
+         total_qty, total_margin, leverage, realized_pnl,
+         pnl_pct_margin, pnl_pct_equity, equity_at_entry, equity_at_close,
+         is_win, max_dca_reached, tp1_hit, tps_hit, trail_pnl_pct,
+         close_reason, signal_leverage, equity_pct_per_trade,
+         opened_at, closed_at, duration_minutes)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (trade_id) DO UPDATE SET
+        realized_pnl=%s, close_price=%s, close_reason=%s, closed_at=%s,
+        pnl_pct_margin=%s, pnl_pct_equity=%s, equity_at_close=%s, is_win=%s,
+        duration_minutes=%s, tps_hit=%s, trail_pnl_pct=%s
+"""
+
+
+def _trade_params(trade_id: str, symbol: str, side: str, entry_price: float,
+                  avg_price: float, close_price: float, total_qty: float,
+                  total_margin: float, realized_pnl: float, max_dca: int,
+                  tp1_hit: bool, close_reason: str, opened_at: float,
+                  closed_at: float, signal_leverage: int,
+                  equity_at_entry: float = 0, equity_at_close: float = 0,
+                  leverage: int = 20, tps_hit: int = 0,
+                  trail_pnl_pct: float = 0,
+                  equity_pct_per_trade: float = 5.0) -> tuple:
+    """Build the _SAVE_TRADE_SQL parameter tuple (incl. derived columns)."""
+    opened_dt = datetime.fromtimestamp(opened_at, tz=timezone.utc) if opened_at else None
+    closed_dt = datetime.fromtimestamp(closed_at, tz=timezone.utc) if closed_at else None
+    duration_min = int((closed_at - opened_at) / 60) if opened_at and closed_at else None
+
+    # Calculate PnL percentages
+    pnl_pct_margin = (realized_pnl / total_margin * 100) if total_margin > 0 else 0
+    pnl_pct_equity = (realized_pnl / equity_at_entry * 100) if equity_at_entry > 0 else 0
+    is_win = realized_pnl > 0.01
+
+    return (trade_id, symbol, side, entry_price, avg_price, close_price,
+            total_qty, total_margin, leverage, realized_pnl,
+            pnl_pct_margin, pnl_pct_equity, equity_at_entry, equity_at_close,
+            is_win, max_dca, tp1_hit, tps_hit, trail_pnl_pct,
+            close_reason, signal_leverage, equity_pct_per_trade,
+            opened_dt, closed_dt, duration_min,
+            # ON CONFLICT updates:
+            realized_pnl, close_price, close_reason, closed_dt,
+            pnl_pct_margin, pnl_pct_equity, equity_at_close, is_win,
+            duration_min, tps_hit, trail_pnl_pct)
+
+
 def save_trade(trade_id: str, symbol: str, side: str, entry_price: float,
                avg_price: float, close_price: float, total_qty: float,
                total_margin: float, realized_pnl: float, max_dca: int,
@@ -306,39 +398,16 @@ def save_trade(trade_id: str, symbol: str, side: str, entry_price: float,
         return False
 
     try:
-        opened_dt = datetime.fromtimestamp(opened_at, tz=timezone.utc) if opened_at else None
-        closed_dt = datetime.fromtimestamp(closed_at, tz=timezone.utc) if closed_at else None
-        duration_min = int((closed_at - opened_at) / 60) if opened_at and closed_at else None
-
-        # Calculate PnL percentages
-        pnl_pct_margin = (realized_pnl / total_margin * 100) if total_margin > 0 else 0
-        pnl_pct_equity = (realized_pnl / equity_at_entry * 100) if equity_at_entry > 0 else 0
-        is_win = realized_pnl > 0.01
-
+        params = _trade_params(
+            trade_id, symbol, side, entry_price, avg_price, close_price,
+            total_qty, total_margin, realized_pnl, max_dca, tp1_hit,
+            close_reason, opened_at, closed_at, signal_leverage,
+            equity_at_entry=equity_at_entry, equity_at_close=equity_at_close,
+            leverage=leverage, tps_hit=tps_hit, trail_pnl_pct=trail_pnl_pct,
+            equity_pct_per_trade=equity_pct_per_trade,
+        )
         cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO trades
-                (trade_id, symbol, side, entry_price, avg_price, close_price,
-                 total_qty, total_margin, leverage, realized_pnl,
-                 pnl_pct_margin, pnl_pct_equity, equity_at_entry, equity_at_close,
-                 is_win, max_dca_reached, tp1_hit, tps_hit, trail_pnl_pct,
-                 close_reason, signal_leverage, equity_pct_per_trade,
-                 opened_at, closed_at, duration_minutes)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (trade_id) DO UPDATE SET
-                realized_pnl=%s, close_price=%s, close_reason=%s, closed_at=%s,
-                pnl_pct_margin=%s, pnl_pct_equity=%s, equity_at_close=%s, is_win=%s,
-                duration_minutes=%s, tps_hit=%s, trail_pnl_pct=%s
-        """, (trade_id, symbol, side, entry_price, avg_price, close_price,
-              total_qty, total_margin, leverage, realized_pnl,
-              pnl_pct_margin, pnl_pct_equity, equity_at_entry, equity_at_close,
-              is_win, max_dca, tp1_hit, tps_hit, trail_pnl_pct,
-              close_reason, signal_leverage, equity_pct_per_trade,
-              opened_dt, closed_dt, duration_min,
-              # ON CONFLICT updates:
-              realized_pnl, close_price, close_reason, closed_dt,
-              pnl_pct_margin, pnl_pct_equity, equity_at_close, is_win,
-              duration_min, tps_hit, trail_pnl_pct))
+        cur.execute(_SAVE_TRADE_SQL, params)
         cur.close()
         return True
     except Exception as e:
@@ -346,32 +415,92 @@ def save_trade(trade_id: str, symbol: str, side: str, entry_price: float,
         return False
 
 
-def update_trade_pnl(trade_id: str, realized_pnl: float, total_margin: float,
-                     equity_at_entry: float) -> bool:
-    """Update PnL for an existing trade (used by admin fix-pnl)."""
-    conn = get_connection()
-    if not conn:
+def save_trades_many(trades: list[dict]) -> bool:
+    """Save several closed trades in one transaction (executemany).
+
+    Each dict holds the save_trade() keyword arguments. Used by Bybit sync
+    so a cycle with N new records costs one commit instead of N.
+    """
+    if not trades:
+        return True
+
+    try:
+        rows = [_trade_params(**t) for t in trades]
+        with transaction() as cur:
+            if cur is None:
+                return False
+            cur.executemany(_SAVE_TRADE_SQL, rows)
+        return True
+    except Exception as e:
+        logger.error(f"DB save_trades_many failed ({len(trades)} trades): {e}")
         return False
 
+
+def save_closed_trades(trades: list[dict], closed_ids: list[str], conn=None) -> bool:
+    """Persist a batch of closes in one transaction (executemany).
+
+    Inserts the filled trades into history (each dict holds save_trade()
+    kwargs) and drops all closed_ids from active_trades in the same commit,
+    so a crash never leaves a trade in both tables or in neither.
+    Pass conn when calling from a thread other than the event loop.
+    """
+    if not trades and not closed_ids:
+        return True
+
     try:
-        pnl_pct_margin = (realized_pnl / total_margin * 100) if total_margin > 0 else 0
-        pnl_pct_equity = (realized_pnl / equity_at_entry * 100) if equity_at_entry > 0 else 0
-        is_win = realized_pnl > 0.01
-        equity_at_close = equity_at_entry + realized_pnl
+        with transaction(conn) as cur:
+            if cur is None:
+                return False
+            if trades:
+                cur.executemany(_SAVE_TRADE_SQL, [_trade_params(**t) for t in trades])
+            if closed_ids:
+                cur.executemany(
+                    "DELETE FROM active_trades WHERE trade_id = %s",
+                    [(tid,) for tid in closed_ids],
+                )
+        return True
+    except Exception as e:
+        logger.error(f"DB save_closed_trades failed ({len(closed_ids)} trades): {e}")
+        return False
 
-        cur = conn.cursor()
-        cur.execute("""
-            UPDATE trades SET
-                realized_pnl = %s, pnl_pct_margin = %s, pnl_pct_equity = %s,
-                equity_at_close = %s, is_win = %s
-            WHERE trade_id = %s
-        """, (realized_pnl, pnl_pct_margin, pnl_pct_equity,
-              equity_at_close, is_win, trade_id))
-        updated = cur.rowcount > 0
-        cur.close()
-        return updated
+
+_UPDATE_PNL_SQL = """
+    UPDATE trades SET
+        realized_pnl = %s, pnl_pct_margin = %s, pnl_pct_equity = %s,
+        equity_at_close = %s, is_win = %s
+    WHERE trade_id = %s
+"""
+
+
+def _pnl_update_params(trade_id: str, realized_pnl: float, total_margin: float,
+                       equity_at_entry: float) -> tuple:
+    """Derived PnL columns for _UPDATE_PNL_SQL."""
+    pnl_pct_margin = (realized_pnl / total_margin * 100) if total_margin > 0 else 0
+    pnl_pct_equity = (realized_pnl / equity_at_entry * 100) if equity_at_entry > 0 else 0
+    is_win = realized_pnl > 0.01
+    equity_at_close = equity_at_entry + realized_pnl
+    return (realized_pnl, pnl_pct_margin, pnl_pct_equity,
+            equity_at_close, is_win, trade_id)
+
+
+def update_trades_pnl_bulk(updates: list[tuple]) -> bool:
+    """Update PnL for several trades in one transaction (executemany).
+
+    Each tuple: (trade_id, realized_pnl, total_margin, equity_at_entry).
+    Used by admin fix-pnl so N corrections cost one commit.
+    """
+    if not updates:
+        return True
+
+    try:
+        rows = [_pnl_update_params(*u) for u in updates]
+        with transaction() as cur:
+            if cur is None:
+                return False
+            cur.executemany(_UPDATE_PNL_SQL, rows)
+        return True
     except Exception as e:
-        logger.error(f"DB update_trade_pnl failed for {trade_id}: {e}")
+        logger.error(f"DB update_trades_pnl_bulk failed ({len(updates)} trades): {e}")
         return False
 
 
@@ -408,91 +537,64 @@ def get_recent_trade_ids(days: int = 7) -> list[dict]:
         return []
 
 
-def get_trade_by_symbol_time(symbol: str, created_time: float) -> bool:
-    """Check if a trade exists in DB for a symbol near a given time.
-
-    Used by Bybit sync to avoid duplicate inserts.
-    Matches within a 60-second window.
-    """
-    conn = get_connection()
-    if not conn:
-        return False
-
-    try:
-        from datetime import datetime, timezone, timedelta
-        dt = datetime.fromtimestamp(created_time, tz=timezone.utc)
-        dt_start = dt - timedelta(seconds=60)
-        dt_end = dt + timedelta(seconds=60)
-
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT 1 FROM trades WHERE symbol = %s AND opened_at BETWEEN %s AND %s LIMIT 1",
-            (symbol, dt_start, dt_end)
-        )
-        row = cur.fetchone()
-        cur.close()
-        return row is not None
-    except Exception as e:
-        logger.error(f"DB get_trade_by_symbol_time failed: {e}")
-        return False
-
-
-def get_trade_by_symbol_close_time(symbol: str, close_time: float) -> bool:
-    """Check if a trade exists in DB for a symbol near a given close time.
+# Bybit sync dedupe windows (seconds), shared by the DB check and the
+# in-cycle check over rows not yet written
+SYNC_OPEN_WINDOW_S = 60
+SYNC_CLOSE_WINDOW_S = 120
 
-    Used by Bybit sync to avoid duplicating bot-managed trades
-    (which have a different opened_at but matching closed_at).
-    Matches within a 120-second window on closed_at.
-    """
-    conn = get_connection()
-    if not conn:
-        return False
 
-    try:
-        from datetime import datetime, timezone, timedelta
-        dt = datetime.fromtimestamp(close_time, tz=timezone.utc)
-        dt_start = dt - timedelta(seconds=120)
-        dt_end = dt + timedelta(seconds=120)
+def sync_record_covered(created_time: float, updated_time: float,
+                        opened_at: float, closed_at: float) -> bool:
+    """Same three rules as trade_exists_for_sync(), against one known trade
+    (same symbol assumed). All times are unix seconds."""
+    return (
+        abs(opened_at - created_time) <= SYNC_OPEN_WINDOW_S
+        or abs(closed_at - updated_time) <= SYNC_CLOSE_WINDOW_S
+        or (opened_at <= created_time + SYNC_CLOSE_WINDOW_S
+            and closed_at >= created_time - SYNC_CLOSE_WINDOW_S)
+    )
 
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT 1 FROM trades WHERE symbol = %s AND closed_at BETWEEN %s AND %s LIMIT 1",
-            (symbol, dt_start, dt_end)
-        )
-        row = cur.fetchone()
-        cur.close()
-        return row is not None
-    except Exception as e:
-        logger.error(f"DB get_trade_by_symbol_close_time failed: {e}")
-        return False
 
+def trade_exists_for_sync(symbol: str, created_time: float, updated_time: float) -> bool:
+    """Check if a Bybit closed-PnL record is already covered by a trade in DB.
 
-def get_trade_by_symbol_in_range(symbol: str, event_time: float) -> bool:
-    """Check if event_time falls within the open→close window of any known trade.
-
-    Used by Bybit sync to detect partial fills (e.g. TP2 close) that belong
-    to a bot-managed trade.  A 120s buffer is applied to both ends.
+    Used by Bybit sync to avoid duplicate inserts. One round-trip for all
+    three dedupe rules (see sync_record_covered() for the in-memory twin):
+      - opened_at within 60s of the record's created_time
+      - closed_at within 120s of the record's updated_time (bot-managed
+        trades saved with a different opened_at)
+      - created_time falls inside a trade's open→close window, 120s buffer
+        on both ends (partial fills like a TP2 close)
     """
     conn = get_connection()
     if not conn:
         return False
 
     try:
-        from datetime import datetime, timezone, timedelta
-        dt = datetime.fromtimestamp(event_time, tz=timezone.utc)
-        buf = timedelta(seconds=120)
+        from datetime import timedelta
+        created_dt = datetime.fromtimestamp(created_time, tz=timezone.utc)
+        updated_dt = datetime.fromtimestamp(updated_time, tz=timezone.utc)
+        open_win = timedelta(seconds=SYNC_OPEN_WINDOW_S)
+        close_win = timedelta(seconds=SYNC_CLOSE_WINDOW_S)
 
         cur = conn.cursor()
-        cur.execute(
-            "SELECT 1 FROM trades WHERE symbol = %s "
-            "AND opened_at <= %s AND closed_at >= %s LIMIT 1",
-            (symbol, dt + buf, dt - buf)
-        )
+        cur.execute("""
+            SELECT 1 FROM trades
+            WHERE symbol = %s AND (
+                opened_at BETWEEN %s AND %s
+                OR closed_at BETWEEN %s AND %s
+                OR (opened_at <= %s AND closed_at >= %s)
+            )
+            LIMIT 1
+        """, (symbol,
+              created_dt - open_win, created_dt + open_win,
+              updated_dt - close_win, updated_dt + close_win,
+              created_dt + close_win, created_dt - close_win))
         row = cur.fetchone()
         cur.close()
         return row is not None
     except Exception as e:
-        logger.error(f"DB get_trade_by_symbol_in_range failed: {e}")
+        logger.error(f"DB trade_exists_for_sync failed: {e}")
         return False
 
 
@@ -663,15 +765,15 @@ def save_active_trade(trade_id: str, symbol: str, side: str,
         return False
 
     try:
-        import json
+        # Serialized once (orjson); the UPDATE branch reuses it via EXCLUDED
+        state = orjson.dumps(state_json).decode()
         cur = conn.cursor()
         cur.execute("""
             INSERT INTO active_trades (trade_id, symbol, side, status, state_json, updated_at)
             VALUES (%s, %s, %s, %s, %s, NOW())
             ON CONFLICT (trade_id) DO UPDATE SET
-                status=%s, state_json=%s, updated_at=NOW()
-        """, (trade_id, symbol, side, status, json.dumps(state_json),
-              status, json.dumps(state_json)))
+                status=EXCLUDED.status, state_json=EXCLUDED.state_json, updated_at=NOW()
+        """, (trade_id, symbol, side, status, state))
         cur.close()
         return True
     except Exception as e:
@@ -706,7 +808,6 @@ def get_all_active_trades(limit: int = 6) -> list[dict]:
         return []
 
     try:
-        import json
         cur = conn.cursor()
 
         # Count total rows
@@ -736,7 +837,7 @@ def get_all_active_trades(limit: int = 6) -> list[dict]:
 
         results = []
         for r in rows:
-            state = r[4] if isinstance(r[4], dict) else json.loads(r[4])
+            state = r[4] if isinstance(r[4], dict) else orjson.loads(r[4])
             results.append({
                 "trade_id": r[0],
                 "symbol": r[1],
@@ -23,12 +23,22 @@ Architecture:
 """
 
 import asyncio
+import functools
+import hashlib
+import json
 import logging
+import re
 import time
+from collections import defaultdict
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from itertools import islice
+from operator import itemgetter
+from pathlib import Path
 
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+import orjson
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import HTMLResponse, ORJSONResponse
 
 from config import load_config, BotConfig
 from telegram_parser import parse_signal, Signal
@@ -65,8 +75,10 @@ sync_task: asyncio.Task | None = None
 # ══════════════════════════════════════════════════════════════════════════
 
 BATCH_BUFFER_SECONDS = 5
+MAX_BUFFERED_SIGNALS = 50  # Hard cap per batch window (flush clears the buffer)
 
-signal_buffer: list[Signal] = []
+# symbol → Signal; dict keeps arrival order and makes the duplicate check O(1)
+signal_buffer: dict[str, Signal] = {}
 buffer_lock = asyncio.Lock()
 _batch_flush_handle: asyncio.TimerHandle | None = None
 
@@ -76,11 +88,16 @@ async def add_signal_to_batch(signal: Signal) -> dict:
     global _batch_flush_handle
 
     async with buffer_lock:
-        for s in signal_buffer:
-            if s.symbol == signal.symbol:
-                return {"status": "duplicate", "symbol": signal.symbol_display}
+        if signal.symbol in signal_buffer:
+            return {"status": "duplicate", "symbol": signal.symbol_display}
+        if len(signal_buffer) >= MAX_BUFFERED_SIGNALS:
+            logger.warning(
+                "Signal buffer full (%d): %s dropped",
+                MAX_BUFFERED_SIGNALS, signal.symbol_display,
+            )
+            return {"status": "buffer_full", "symbol": signal.symbol_display}
 
-        signal_buffer.append(signal)
+        signal_buffer[signal.symbol] = signal
         count = len(signal_buffer)
         logger.info(
             f"Signal buffered: {signal.side.upper()} {signal.symbol_display} "
@@ -107,7 +124,7 @@ async def flush_batch():
     async with buffer_lock:
         if not signal_buffer:
             return
-        batch = list(signal_buffer)
+        batch = list(signal_buffer.values())
         signal_buffer.clear()
 
     free_slots = config.max_simultaneous_trades - trade_mgr.active_count
@@ -254,6 +271,15 @@ async def execute_signal(signal: Signal, batch_id: str = "") -> dict:
 # ▌ PRICE MONITOR
 # ══════════════════════════════════════════════════════════════════════════
 
+# Status groups checked per trade per cycle (built once, not per iteration)
+_TP_CHECK_STATUSES = frozenset((TradeStatus.OPEN, TradeStatus.DCA_ACTIVE))
+_POSITION_STATUSES = frozenset((
+    TradeStatus.TRAILING, TradeStatus.BE_TRAILING,
+    TradeStatus.DCA_ACTIVE, TradeStatus.OPEN,
+))
+_SAFETY_SKIP_STATUSES = frozenset((TradeStatus.CLOSED, TradeStatus.PENDING))
+
+
 async def price_monitor():
     """Background task: poll order fills and detect exchange-side closes.
 
@@ -277,11 +303,11 @@ async def price_monitor():
                 continue
 
             for trade in active:
-                if trade.status == TradeStatus.CLOSED:
+                if trade.status is TradeStatus.CLOSED:
                     continue
 
                 # ── 0. PENDING: check E1 limit fill / timeout ──
-                if trade.status == TradeStatus.PENDING:
+                if trade.status is TradeStatus.PENDING:
                     filled = bybit.check_e1_filled(trade)
                     if filled:
                         trade.status = TradeStatus.OPEN
@@ -301,13 +327,13 @@ async def price_monitor():
                             batch_fills = sum(
                                 1 for t in trade_mgr.active_trades
                                 if t.batch_id == trade.batch_id
-                                and t.status != TradeStatus.PENDING
+                                and t.status is not TradeStatus.PENDING
                             )
                             if batch_fills >= config.max_fills_per_batch:
                                 pending_same_batch = [
                                     t for t in trade_mgr.active_trades
                                     if t.batch_id == trade.batch_id
-                                    and t.status == TradeStatus.PENDING
+                                    and t.status is TradeStatus.PENDING
                                 ]
                                 for pt in pending_same_batch:
                                     bybit.cancel_e1(pt)
@@ -346,7 +372,7 @@ async def price_monitor():
 
                 # ── 1. Check Multi-TP fills (exchange-side limit orders) ──
                 # Works for both E1 mode (signal TPs) and DCA mode (avg-based TPs)
-                if trade.status in (TradeStatus.OPEN, TradeStatus.DCA_ACTIVE):
+                if trade.status in _TP_CHECK_STATUSES:
                     for tp_idx in range(len(trade.tp_prices)):
                         if trade.tp_filled[tp_idx] or not trade.tp_order_ids[tp_idx]:
                             continue
@@ -363,11 +389,8 @@ async def price_monitor():
                                     # DCA TP1 → SL to BE (exakt avg, kein buffer)
                                     # Bei 0.5% TP1 ist der Abstand eh nur 0.5% —
                                     # ein Buffer würde SL fast zum zweiten TP machen
-                                    buffer = config.dca_be_buffer_pct / 100
-                                    if trade.side == "long":
-                                        be_price = trade.avg_price * (1 + buffer)
-                                    else:
-                                        be_price = trade.avg_price * (1 - buffer)
+                                    buffer = config.dca_be_buffer_frac
+                                    be_price = trade.avg_price * (1 + trade.side_sign * buffer)
                                     sl_ok = bybit.set_trading_stop(
                                         trade.symbol, trade.side,
                                         stop_loss=be_price,
@@ -388,7 +411,7 @@ async def price_monitor():
 
                                 # After all DCA TPs: trail remaining with SL floor at TP1
                                 if all(trade.tp_filled):
-                                    trail_dist = tp_fill_price * config.dca_trail_callback_pct / 100
+                                    trail_dist = tp_fill_price * config.dca_trail_callback_frac
                                     tp1_price = trade.tp_prices[0]
                                     sl_ok = bybit.set_trading_stop(
                                         trade.symbol, trade.side,
@@ -419,17 +442,14 @@ async def price_monitor():
 
                                 if tp_idx == 0 and config.sl_to_be_after_tp1:
                                     # TP1: SL → breakeven + 0.1% buffer + cancel DCAs
-                                    buffer = config.be_buffer_pct / 100
-                                    if trade.side == "long":
-                                        be_price = trade.signal_entry * (1 + buffer)
-                                    else:
-                                        be_price = trade.signal_entry * (1 - buffer)
+                                    buffer = config.be_buffer_frac
+                                    be_price = trade.signal_entry * (1 + trade.side_sign * buffer)
                                     sl_ok = bybit.set_trading_stop(
                                         trade.symbol, trade.side,
                                         stop_loss=be_price,
                                     )
                                     trade.hard_sl_price = be_price
-                                    for dca in trade.dca_levels[1:]:
+                                    for dca in islice(trade.dca_levels, 1, None):
                                         if dca.order_id and not dca.filled:
                                             bybit.cancel_order(trade.symbol, dca.order_id)
                                             dca.order_id = ""
@@ -508,7 +528,7 @@ async def price_monitor():
 
                                 # After last E1 TP (TP4): activate trailing on remaining
                                 if all(trade.tp_filled):
-                                    trail_dist = tp_fill_price * config.trailing_callback_pct / 100
+                                    trail_dist = tp_fill_price * config.trailing_callback_frac
                                     sl_ok = bybit.set_trading_stop(
                                         trade.symbol, trade.side,
                                         stop_loss=trade.hard_sl_price,
@@ -532,10 +552,7 @@ async def price_monitor():
                             break  # One TP per cycle
 
                 # ── 2. Check DCA fills (exchange-side limit orders) ──
-                for i in range(1, trade.max_dca + 1):
-                    if i >= len(trade.dca_levels):
-                        break
-                    dca = trade.dca_levels[i]
+                for i, dca in enumerate(islice(trade.dca_levels, 1, None), 1):
                     if dca.filled or not dca.order_id:
                         continue
                     dca_filled, dca_fill_price = bybit.check_order_filled(
@@ -566,26 +583,20 @@ async def price_monitor():
                 # After DCA fills, SL is at deepest_fill+3% (~4.7% equity risk).
                 # Once price moves 0.5% in our favor → tighten SL to avg+0.5%
                 # (~1.1% equity risk). Keeps -3% as safety net until bounce confirms.
-                if (trade.status == TradeStatus.DCA_ACTIVE
+                if (trade.status is TradeStatus.DCA_ACTIVE
                         and trade.current_dca > 0
                         and not trade.quick_trail_active
                         and trade.tps_hit == 0):
                     current_price = bybit.get_ticker_price(trade.symbol)
                     if current_price:
-                        trigger_pct = config.dca_quick_trail_trigger_pct / 100
-                        if trade.side == "long":
-                            trigger_price = trade.avg_price * (1 + trigger_pct)
-                            price_in_favor = current_price >= trigger_price
-                        else:
-                            trigger_price = trade.avg_price * (1 - trigger_pct)
-                            price_in_favor = current_price <= trigger_price
+                        trigger_pct = config.dca_quick_trail_trigger_frac
+                        sign = trade.side_sign
+                        trigger_price = trade.avg_price * (1 + sign * trigger_pct)
+                        price_in_favor = sign * (current_price - trigger_price) >= 0
 
                         if price_in_favor:
-                            buffer_pct = config.dca_quick_trail_buffer_pct / 100
-                            if trade.side == "long":
-                                new_sl = trade.avg_price * (1 - buffer_pct)
-                            else:
-                                new_sl = trade.avg_price * (1 + buffer_pct)
+                            buffer_pct = config.dca_quick_trail_buffer_frac
+                            new_sl = trade.avg_price * (1 - trade.side_sign * buffer_pct)
                             sl_ok = bybit.set_trading_stop(
                                 trade.symbol, trade.side,
                                 stop_loss=new_sl,
@@ -607,8 +618,7 @@ async def price_monitor():
                                 )
 
                 # ── 3. Detect position closed by exchange (SL/trailing triggered) ──
-                if trade.status in (TradeStatus.TRAILING, TradeStatus.BE_TRAILING,
-                                    TradeStatus.DCA_ACTIVE, TradeStatus.OPEN):
+                if trade.status in _POSITION_STATUSES:
                     pos = bybit.get_position(trade.symbol)
                     if pos is None or pos["size"] == 0:
                         # Position closed by Bybit (SL or trailing stop triggered)
@@ -618,6 +628,9 @@ async def price_monitor():
                         # Step 2: Re-verify position after cancelling orders
                         # (cancelling reduceOnly orders can't reopen, but be safe)
                         await asyncio.sleep(0.5)
+                        # A Neo Cloud close may have finished during the await
+                        if trade.status is TradeStatus.CLOSED:
+                            continue
                         pos_verify = bybit.get_position(trade.symbol)
                         if pos_verify and pos_verify["size"] > 0:
                             # Residual found! Force close with exchange qty
@@ -629,6 +642,8 @@ async def price_monitor():
 
                         # Get actual PnL from Bybit (includes fees + exact fill prices)
                         await asyncio.sleep(1)  # Wait for Bybit to settle closed PnL records
+                        if trade.status is TradeStatus.CLOSED:
+                            continue
                         bybit_pnl = _get_bybit_realized_pnl(trade)
                         price = bybit.get_ticker_price(trade.symbol) or trade.avg_price
 
@@ -642,10 +657,7 @@ async def price_monitor():
                             # Fallback: estimate from mark price (less accurate)
                             remaining = trade.remaining_qty
                             if remaining > 0:
-                                if trade.side == "long":
-                                    pnl = (price - trade.avg_price) * remaining
-                                else:
-                                    pnl = (trade.avg_price - price) * remaining
+                                pnl = trade.side_sign * (price - trade.avg_price) * remaining
                                 trade.realized_pnl += pnl
                             logger.warning(
                                 f"PnL fallback (mark price): {trade.symbol_display} | "
@@ -653,7 +665,7 @@ async def price_monitor():
                             )
 
                         # Build specific close reason
-                        if trade.status == TradeStatus.TRAILING:
+                        if trade.status is TradeStatus.TRAILING:
                             reason = "Trailing stop"
                         elif trade.tps_hit > 0:
                             reason = f"SL (at TP{trade.tps_hit} level)"
@@ -796,15 +808,14 @@ def _complete_scale_in(trade: Trade) -> None:
 
     # Consolidate (drop TPs below min_qty) and place new orders
     _consolidate_tp_qtys(trade)
-    for i in range(len(trade.tp_prices)):
-        if trade.tp_filled[i] or not trade.tp_close_qtys[i]:
-            continue
-        order_id = bybit.place_tp_order(
-            trade, trade.tp_prices[i], trade.tp_close_qtys[i],
-            tp_num=i + 1, tag="STP"  # STP = Scale-in TP
-        )
-        if order_id:
-            trade.tp_order_ids[i] = order_id
+    tps = [
+        (i + 1, trade.tp_prices[i], trade.tp_close_qtys[i])
+        for i in range(len(trade.tp_prices))
+        if not trade.tp_filled[i] and trade.tp_close_qtys[i]
+    ]
+    order_ids = bybit.place_tp_orders(trade, tps, tag="STP")  # STP = Scale-in TP
+    for tp_num, order_id in order_ids.items():
+        trade.tp_order_ids[tp_num - 1] = order_id
 
     placed = sum(1 for i, oid in enumerate(trade.tp_order_ids) if oid and not trade.tp_filled[i])
     logger.info(
@@ -898,16 +909,19 @@ def _place_exchange_tps(trade: Trade) -> None:
 
     Places TP1-TP4 at signal target prices with configured close percentages.
     """
-    for i, tp_price in enumerate(trade.tp_prices):
-        if i >= len(trade.tp_close_qtys):
-            break
-        qty = trade.tp_close_qtys[i]
-        order_id = bybit.place_tp_order(trade, tp_price, qty, tp_num=i + 1)
+    # One create-batch request for all TPs instead of one HTTP call each
+    tps = [
+        (i + 1, tp_price, qty)
+        for i, (tp_price, qty) in enumerate(zip(trade.tp_prices, trade.tp_close_qtys))
+    ]
+    order_ids = bybit.place_tp_orders(trade, tps)
+    for tp_num, tp_price, _ in tps:
+        order_id = order_ids.get(tp_num)
         if order_id:
-            trade.tp_order_ids[i] = order_id
+            trade.tp_order_ids[tp_num - 1] = order_id
         else:
             logger.warning(
-                f"TP{i + 1} placement failed: {trade.symbol_display} @ {tp_price}"
+                f"TP{tp_num} placement failed: {trade.symbol_display} @ {tp_price}"
             )
 
     placed = sum(1 for oid in trade.tp_order_ids if oid)
@@ -924,11 +938,8 @@ def _set_initial_sl(trade: Trade) -> None:
     Wide safety SL gives DCA room to fill at -5% before stopping out.
     After DCA fills → SL tightens to avg-3% (in _set_exchange_stops_after_dca).
     """
-    sl_pct = config.safety_sl_pct / 100
-    if trade.side == "long":
-        trade.hard_sl_price = trade.avg_price * (1 - sl_pct)
-    else:
-        trade.hard_sl_price = trade.avg_price * (1 + sl_pct)
+    sl_pct = config.safety_sl_frac
+    trade.hard_sl_price = trade.avg_price * (1 - trade.side_sign * sl_pct)
 
     sl_ok = bybit.set_trading_stop(
         trade.symbol, trade.side,
@@ -962,16 +973,19 @@ def _place_dca_tps(trade: Trade) -> None:
     Uses avg-based TP prices set by trade_mgr.setup_dca_tps().
     TP1=50% at avg+0.5%, TP2=20% at avg+1.25%, remaining 30% trails.
     """
-    for i, tp_price in enumerate(trade.tp_prices):
-        if i >= len(trade.tp_close_qtys):
-            break
-        qty = trade.tp_close_qtys[i]
-        order_id = bybit.place_tp_order(trade, tp_price, qty, tp_num=i + 1, tag="DTP")
+    # One create-batch request for all TPs instead of one HTTP call each
+    tps = [
+        (i + 1, tp_price, qty)
+        for i, (tp_price, qty) in enumerate(zip(trade.tp_prices, trade.tp_close_qtys))
+    ]
+    order_ids = bybit.place_tp_orders(trade, tps, tag="DTP")
+    for tp_num, tp_price, _ in tps:
+        order_id = order_ids.get(tp_num)
         if order_id:
-            trade.tp_order_ids[i] = order_id
+            trade.tp_order_ids[tp_num - 1] = order_id
         else:
             logger.warning(
-                f"DCA TP{i + 1} placement failed: {trade.symbol_display} @ {tp_price}"
+                f"DCA TP{tp_num} placement failed: {trade.symbol_display} @ {tp_price}"
             )
 
     placed = sum(1 for oid in trade.tp_order_ids if oid)
@@ -1169,7 +1183,7 @@ async def safety_monitor():
                 continue
 
             for trade in active:
-                if trade.status in (TradeStatus.CLOSED, TradeStatus.PENDING):
+                if trade.status in _SAFETY_SKIP_STATUSES:
                     continue
 
                 # Check position on exchange
@@ -1207,11 +1221,8 @@ async def safety_monitor():
                             )
                     else:
                         # Fallback: set safety SL at entry-10%
-                        sl_pct = config.safety_sl_pct / 100
-                        if trade.side == "long":
-                            sl_price = trade.avg_price * (1 - sl_pct)
-                        else:
-                            sl_price = trade.avg_price * (1 + sl_pct)
+                        sl_pct = config.safety_sl_frac
+                        sl_price = trade.avg_price * (1 - trade.side_sign * sl_pct)
                         trade.hard_sl_price = sl_price
                         sl_ok = bybit.set_trading_stop(
                             trade.symbol, trade.side,
@@ -1237,6 +1248,11 @@ async def safety_monitor():
             await asyncio.sleep(10)
 
 
+def _sl_equivalent(a: float, b: float, tol_bps: float = 1.0) -> bool:
+    """True if exchange SL `a` already matches target `b` (within tol_bps)."""
+    return abs(a - b) <= b * tol_bps * 1e-4
+
+
 async def _recover_and_check_positions():
     """Recover active trades from DB, reconcile with Bybit, detect orphans.
 
@@ -1253,10 +1269,11 @@ async def _recover_and_check_positions():
         # ── Step 1: Trades already pre-loaded in lifespan startup ──
         active_count = trade_mgr.active_count
         if active_count:
-            logger.info(f"RECOVERY: Reconciling {active_count} pre-loaded trades with Bybit...")
+            logger.info("RECOVERY: Reconciling %s pre-loaded trades with Bybit...", active_count)
 
         # ── Step 2+3: Reconcile each recovered trade with Bybit ──
-        for trade in list(trade_mgr.active_trades):
+        # active_trades builds a new list, safe to close trades while iterating
+        for trade in trade_mgr.active_trades:
             pos = bybit.get_position(trade.symbol)
 
             if pos is None or pos["size"] == 0:
@@ -1264,18 +1281,16 @@ async def _recover_and_check_positions():
                 price = bybit.get_ticker_price(trade.symbol) or trade.avg_price
                 remaining = trade.remaining_qty
                 if remaining > 0:
-                    if trade.side == "long":
-                        pnl = (price - trade.avg_price) * remaining
-                    else:
-                        pnl = (trade.avg_price - price) * remaining
+                    pnl = trade.side_sign * (price - trade.avg_price) * remaining
                     trade.realized_pnl += pnl
                 trade_mgr.close_trade(
                     trade, price, trade.realized_pnl,
                     "Closed during bot downtime (exchange-side)"
                 )
                 logger.info(
-                    f"RECOVERY: {trade.symbol_display} was closed during downtime | "
-                    f"PnL: ${trade.realized_pnl:+.2f}"
+                    "RECOVERY: %s was closed during downtime | "
+                    "PnL: $%+.2f",
+                    trade.symbol_display, trade.realized_pnl,
                 )
                 continue
 
@@ -1285,7 +1300,7 @@ async def _recover_and_check_positions():
 
             # ── Check TP order fills that happened during downtime ──
             tps_updated = False
-            if trade.status == TradeStatus.OPEN and trade.current_dca == 0:
+            if trade.status is TradeStatus.OPEN and trade.current_dca == 0:
                 for tp_idx in range(len(trade.tp_prices)):
                     if trade.tp_filled[tp_idx] or not trade.tp_order_ids[tp_idx]:
                         continue
@@ -1297,8 +1312,9 @@ async def _recover_and_check_positions():
                         trade_mgr.record_tp_fill(trade, tp_idx, close_qty, tp_fill_price)
                         tps_updated = True
                         logger.info(
-                            f"RECOVERY: TP{tp_idx+1} was filled during downtime | "
-                            f"{trade.symbol_display} @ {tp_fill_price:.4f}"
+                            "RECOVERY: TP%s was filled during downtime | "
+                            "%s @ %.4f",
+                            tp_idx+1, trade.symbol_display, tp_fill_price,
                         )
 
             if tps_updated:
@@ -1313,23 +1329,29 @@ async def _recover_and_check_positions():
                     if all(trade.tp_filled):
                         # All TPs filled → trailing mode (SL at TP1)
                         last_tp_price = trade.tp_prices[-1]
-                        trail_dist = last_tp_price * config.trailing_callback_pct / 100
+                        trail_dist = last_tp_price * config.trailing_callback_frac
                         trade.hard_sl_price = trade.tp_prices[0]  # SL at TP1
-                        sl_ok = bybit.set_trading_stop(
-                            trade.symbol, trade.side,
-                            stop_loss=trade.hard_sl_price,
-                            trailing_stop=trail_dist,
-                        )
+                        if (_sl_equivalent(pos["stop_loss"], trade.hard_sl_price)
+                                and _sl_equivalent(pos["trailing_stop"], trail_dist)):
+                            sl_ok = True  # Exchange already holds this SL + trail
+                        else:
+                            sl_ok = bybit.set_trading_stop(
+                                trade.symbol, trade.side,
+                                stop_loss=trade.hard_sl_price,
+                                trailing_stop=trail_dist,
+                            )
                         trade.status = TradeStatus.TRAILING
                         if sl_ok:
                             logger.info(
-                                f"RECOVERY: All TPs filled → trailing: {trade.symbol_display} | "
-                                f"SL=TP1={trade.hard_sl_price:.4f}"
+                                "RECOVERY: All TPs filled → trailing: %s | "
+                                "SL=TP1=%.4f",
+                                trade.symbol_display, trade.hard_sl_price,
                             )
                         else:
                             logger.critical(
-                                f"RECOVERY: Trailing SL FAILED: {trade.symbol_display} | "
-                                f"SL={trade.hard_sl_price:.4f} NOT VERIFIED!"
+                                "RECOVERY: Trailing SL FAILED: %s | "
+                                "SL=%.4f NOT VERIFIED!",
+                                trade.symbol_display, trade.hard_sl_price,
                             )
                     elif highest_tp >= 2:
                         # TP3+: SL → TP2 price (if scale-in) or TP1 price (no scale-in)
@@ -1339,24 +1361,29 @@ async def _recover_and_check_positions():
                         else:
                             sl_target = trade.tp_prices[0]  # TP1 price
                             sl_label = "TP1"
-                        sl_ok = bybit.set_trading_stop(
-                            trade.symbol, trade.side,
-                            stop_loss=sl_target,
-                        )
+                        if _sl_equivalent(pos["stop_loss"], sl_target):
+                            sl_ok = True  # Exchange already holds this SL
+                        else:
+                            sl_ok = bybit.set_trading_stop(
+                                trade.symbol, trade.side,
+                                stop_loss=sl_target,
+                            )
                         trade.hard_sl_price = sl_target
-                        for dca in trade.dca_levels[1:]:
+                        for dca in islice(trade.dca_levels, 1, None):
                             if dca.order_id and not dca.filled:
                                 bybit.cancel_order(trade.symbol, dca.order_id)
                                 dca.order_id = ""
                         if sl_ok:
                             logger.info(
-                                f"RECOVERY: TP{highest_tp+1}→SL={sl_label}: {trade.symbol_display} | "
-                                f"SL={sl_target:.4f}"
+                                "RECOVERY: TP%s→SL=%s: %s | "
+                                "SL=%.4f",
+                                highest_tp+1, sl_label, trade.symbol_display, sl_target,
                             )
                         else:
                             logger.critical(
-                                f"RECOVERY: TP{highest_tp+1}→SL={sl_label} FAILED: "
-                                f"{trade.symbol_display} | SL={sl_target:.4f} NOT VERIFIED!"
+                                "RECOVERY: TP%s→SL=%s FAILED: "
+                                "%s | SL=%.4f NOT VERIFIED!",
+                                highest_tp+1, sl_label, trade.symbol_display, sl_target,
                             )
                     elif highest_tp <= 1 and config.sl_to_be_after_tp1:
                         # TP1 or TP2: SL at BE + 0.1% buffer
@@ -1364,39 +1391,40 @@ async def _recover_and_check_positions():
                         # (too risky after downtime, market may have moved)
                         if highest_tp == 1 and config.scale_in_enabled and trade.current_dca == 0:
                             logger.warning(
-                                f"RECOVERY: TP2 filled during downtime, scale-in SKIPPED: "
-                                f"{trade.symbol_display} (market may have moved)"
+                                "RECOVERY: TP2 filled during downtime, scale-in SKIPPED: "
+                                "%s (market may have moved)",
+                                trade.symbol_display,
                             )
-                        buffer = config.be_buffer_pct / 100
-                        if trade.side == "long":
-                            be_price = trade.signal_entry * (1 + buffer)
+                        buffer = config.be_buffer_frac
+                        be_price = trade.signal_entry * (1 + trade.side_sign * buffer)
+                        if _sl_equivalent(pos["stop_loss"], be_price):
+                            sl_ok = True  # Exchange already holds this SL
                         else:
-                            be_price = trade.signal_entry * (1 - buffer)
-                        sl_ok = bybit.set_trading_stop(
-                            trade.symbol, trade.side,
-                            stop_loss=be_price,
-                        )
+                            sl_ok = bybit.set_trading_stop(
+                                trade.symbol, trade.side,
+                                stop_loss=be_price,
+                            )
                         trade.hard_sl_price = be_price
-                        for dca in trade.dca_levels[1:]:
+                        for dca in islice(trade.dca_levels, 1, None):
                             if dca.order_id and not dca.filled:
                                 bybit.cancel_order(trade.symbol, dca.order_id)
                                 dca.order_id = ""
                         if sl_ok:
                             logger.info(
-                                f"RECOVERY: TP{highest_tp+1}→SL=BE: {trade.symbol_display} | "
-                                f"SL={be_price:.4f} (entry+{config.be_buffer_pct}% buffer)"
+                                "RECOVERY: TP%s→SL=BE: %s | "
+                                "SL=%.4f (entry+%s%% buffer)",
+                                highest_tp+1, trade.symbol_display, be_price,
+                                config.be_buffer_pct,
                             )
                         else:
                             logger.critical(
-                                f"RECOVERY: SL=BE FAILED: {trade.symbol_display} | "
-                                f"SL={be_price:.4f} NOT VERIFIED!"
+                                "RECOVERY: SL=BE FAILED: %s | "
+                                "SL=%.4f NOT VERIFIED!",
+                                trade.symbol_display, be_price,
                             )
 
             # ── Check DCA order fills that happened during downtime ──
-            for i in range(1, trade.max_dca + 1):
-                if i >= len(trade.dca_levels):
-                    break
-                dca = trade.dca_levels[i]
+            for i, dca in enumerate(islice(trade.dca_levels, 1, None), 1):
                 if dca.filled or not dca.order_id:
                     continue
                 dca_filled, dca_fill_price = bybit.check_order_filled(
@@ -1410,8 +1438,9 @@ async def _recover_and_check_positions():
                     _place_dca_tps(trade)
                     _set_exchange_stops_after_dca(trade)
                     logger.info(
-                        f"RECOVERY: DCA{i} was filled during downtime | "
-                        f"{trade.symbol_display} @ {dca_fill_price:.4f}"
+                        "RECOVERY: DCA%s was filled during downtime | "
+                        "%s @ %.4f",
+                        i, trade.symbol_display, dca_fill_price,
                     )
 
             # ── Verify SL is set on exchange ──
@@ -1423,55 +1452,62 @@ async def _recover_and_check_positions():
                     )
                     if sl_ok:
                         logger.warning(
-                            f"RECOVERY: SL restored: {trade.symbol_display} | "
-                            f"SL={trade.hard_sl_price:.4f}"
+                            "RECOVERY: SL restored: %s | "
+                            "SL=%.4f",
+                            trade.symbol_display, trade.hard_sl_price,
                         )
                     else:
                         logger.critical(
-                            f"RECOVERY: SL restore FAILED: {trade.symbol_display} | "
-                            f"SL={trade.hard_sl_price:.4f} NOT VERIFIED!"
+                            "RECOVERY: SL restore FAILED: %s | "
+                            "SL=%.4f NOT VERIFIED!",
+                            trade.symbol_display, trade.hard_sl_price,
                         )
 
             # Persist updated state
             trade_mgr.persist_trade(trade)
 
-            logger.info(
-                f"RECOVERY OK: {trade.symbol_display} {trade.side.upper()} | "
-                f"Status: {trade.status.value} | Qty: {pos['size']} | "
-                f"Avg: {pos['avg_price']:.4f} | SL: {trade.hard_sl_price:.4f} | "
-                f"TPs: {trade.tps_hit}/{len(trade.tp_prices)}"
-            )
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "RECOVERY OK: %s %s | "
+                    "Status: %s | Qty: %s | "
+                    "Avg: %.4f | SL: %.4f | "
+                    "TPs: %s/%s",
+                    trade.symbol_display, trade.side.upper(), trade.status.value, pos['size'],
+                    pos['avg_price'], trade.hard_sl_price, trade.tps_hit, len(trade.tp_prices),
+                )
 
             await asyncio.sleep(0.3)  # Rate limit
 
         # ── Step 4: Detect orphan positions (on Bybit but not tracked) ──
         all_positions = bybit.get_all_positions()
         if all_positions:
-            tracked_symbols = set()
-            for trade in trade_mgr.active_trades:
-                if trade.status != TradeStatus.CLOSED:
-                    tracked_symbols.add((trade.symbol, trade.side))
+            tracked_symbols = frozenset(
+                (t.symbol, t.side) for t in trade_mgr.active_trades
+                if t.status is not TradeStatus.CLOSED
+            )
 
             for pos in all_positions:
-                key = (pos["symbol"], pos["side"])
-                if key not in tracked_symbols:
+                if (pos["symbol"], pos["side"]) not in tracked_symbols:
                     logger.warning(
-                        f"ORPHAN POSITION: {pos['symbol']} {pos['side'].upper()} | "
-                        f"size={pos['size']} | avg={pos['avg_price']} | "
-                        f"SL={'SET' if pos['stop_loss'] > 0 else 'NONE!'} | "
-                        f"uPnL={pos['unrealized_pnl']:+.2f} | "
-                        f"NOT tracked by bot!"
+                        "ORPHAN POSITION: %s %s | "
+                        "size=%s | avg=%s | "
+                        "SL=%s | "
+                        "uPnL=%+.2f | "
+                        "NOT tracked by bot!",
+                        pos['symbol'], pos['side'].upper(), pos['size'], pos['avg_price'],
+                        'SET' if pos['stop_loss'] > 0 else 'NONE!', pos['unrealized_pnl'],
                     )
 
         total_active = trade_mgr.active_count
         total_exchange = len(all_positions) if all_positions else 0
         logger.info(
-            f"RECOVERY COMPLETE: {total_active} active trades, "
-            f"{total_exchange} positions on Bybit"
+            "RECOVERY COMPLETE: %s active trades, "
+            "%s positions on Bybit",
+            total_active, total_exchange,
         )
 
     except Exception as e:
-        logger.error(f"Recovery error: {e}", exc_info=True)
+        logger.error("Recovery error: %s", e, exc_info=True)
 
 
 # ══════════════════════════════════════════════════════════════════════════
@@ -1481,7 +1517,23 @@ async def _recover_and_check_positions():
 TRADE_SYNC_INTERVAL = 120  # seconds (every 2 minutes)
 
 
-def _aggregate_closed_pnl(records: list[dict]) -> list[dict]:
+@dataclass(slots=True)
+class ClosedPnlRec:
+    """One position close event (one or more aggregated Bybit fills)."""
+    symbol: str
+    side: str
+    qty: float
+    entry_price: float
+    exit_price: float
+    closed_pnl: float
+    order_type: str
+    leverage: str
+    created_time: float
+    updated_time: float
+    fill_count: int = 1
+
+
+def _aggregate_closed_pnl(records: list[dict]) -> list[ClosedPnlRec]:
     """Aggregate closed PnL records by (symbol, side) within time window.
 
     Bybit returns one record per execution fill. A single close order
@@ -1496,6 +1548,12 @@ def _aggregate_closed_pnl(records: list[dict]) -> list[dict]:
     if not records:
         return []
 
+    # Fast path: every (symbol, side) appears once → every group is a
+    # singleton, no sort/group needed (normal case: one fill per close)
+    keys = {(r["symbol"], r["side"]) for r in records}
+    if len(keys) == len(records):
+        return [ClosedPnlRec(**r) for r in records]
+
     # Sort by symbol, side, time
     sorted_recs = sorted(
         records, key=lambda r: (r["symbol"], r["side"], r["created_time"])
@@ -1530,19 +1588,19 @@ def _aggregate_closed_pnl(records: list[dict]) -> list[dict]:
         else:
             avg_exit = group[0]["exit_price"]
 
-        aggregated.append({
-            "symbol": group[0]["symbol"],
-            "side": group[0]["side"],
-            "qty": total_qty,
-            "entry_price": group[0]["entry_price"],
-            "exit_price": avg_exit,
-            "closed_pnl": total_pnl,
-            "order_type": group[0]["order_type"],
-            "leverage": group[0]["leverage"],
-            "created_time": group[0]["created_time"],
-            "updated_time": group[-1]["updated_time"],
-            "fill_count": len(group),
-        })
+        aggregated.append(ClosedPnlRec(
+            symbol=group[0]["symbol"],
+            side=group[0]["side"],
+            qty=total_qty,
+            entry_price=group[0]["entry_price"],
+            exit_price=avg_exit,
+            closed_pnl=total_pnl,
+            order_type=group[0]["order_type"],
+            leverage=group[0]["leverage"],
+            created_time=group[0]["created_time"],
+            updated_time=group[-1]["updated_time"],
+            fill_count=len(group),
+        ))
 
         i = j
 
@@ -1564,7 +1622,7 @@ async def bybit_trade_sync():
 
     # Only sync trades closed after bot started (prevents re-inserting deleted trades)
     sync_start_ms = int(time.time() * 1000)
-    logger.info(f"Bybit sync: only syncing trades after {sync_start_ms}")
+    logger.info("Bybit sync: only syncing trades after %s", sync_start_ms)
 
     while True:
         try:
@@ -1578,73 +1636,92 @@ async def bybit_trade_sync():
             # A single close order can have multiple fills on Bybit.
             aggregated = _aggregate_closed_pnl(records)
 
-            for rec in aggregated:
-                # Check if already in DB (by open time match)
-                existing = db.get_trade_by_symbol_time(
-                    rec["symbol"], rec["created_time"]
-                )
-                if existing:
-                    continue
+            # Dedupe reads the trades table: bot closes still queued in the
+            # writer would look like untracked trades → wait, else skip cycle.
+            # Re-check on the loop: a close queued while we resumed is in
+            # neither `tracked` nor the table (no await until the dedupe).
+            drained = await asyncio.to_thread(trade_mgr.wait_for_writes, 5.0)
+            if not drained or trade_mgr.has_pending_writes():
+                logger.warning("Bybit sync: close writes pending, skipping cycle")
+                continue
 
-                # Also check by close time (catches bot-managed trades
-                # that were saved with different opened_at)
-                existing_close = db.get_trade_by_symbol_close_time(
-                    rec["symbol"], rec["updated_time"]
-                )
-                if existing_close:
+            # Bot-managed (symbol, side) pairs → O(1) lookup per record
+            tracked = {(t.symbol, t.side) for t in trade_mgr.active_trades}
+
+            # Equity fetched at most once per cycle (only if something gets saved)
+            equity = None
+            new_recs = []
+            new_trades = []
+            # Rows queued this cycle aren't in the DB yet → same window
+            # rules as trade_exists_for_sync, checked in memory
+            queued: dict[str, list[tuple[float, float]]] = defaultdict(list)
+
+            for rec in aggregated:
+                if any(
+                    db.sync_record_covered(rec.created_time, rec.updated_time, o, c)
+                    for o, c in queued[rec.symbol]
+                ):
                     continue
 
-                # Check if this close event falls within an existing
-                # trade's lifetime (catches partial TP fills like TP2
-                # close events that are separate Bybit PnL records)
-                if db.get_trade_by_symbol_in_range(
-                    rec["symbol"], rec["created_time"]
+                # Check if already in DB: open time match, close time match
+                # (bot-managed trades saved with different opened_at), or
+                # inside an existing trade's lifetime (partial TP fills
+                # like TP2 close events that are separate Bybit PnL records)
+                if db.trade_exists_for_sync(
+                    rec.symbol, rec.created_time, rec.updated_time
                 ):
                     continue
 
                 # Check if bot-managed (don't double-save)
-                is_tracked = False
-                for trade in trade_mgr.active_trades:
-                    if (trade.symbol == rec["symbol"] and
-                            trade.side == rec["side"]):
-                        is_tracked = True
-                        break
-                if is_tracked:
+                if (rec.symbol, rec.side) in tracked:
                     continue
 
-                # Not tracked and not in DB → save it
-                trade_id = f"bybit_{rec['symbol']}_{rec['side']}_{int(rec['created_time'])}"
-                equity = bybit.get_equity() or 0
-                db.save_trade(
-                    trade_id=trade_id,
-                    symbol=rec["symbol"],
-                    side=rec["side"],
-                    entry_price=rec["entry_price"],
-                    avg_price=rec["entry_price"],
-                    close_price=rec["exit_price"],
-                    total_qty=rec["qty"],
-                    total_margin=rec["qty"] * rec["entry_price"] / config.leverage,
-                    realized_pnl=rec["closed_pnl"],
-                    max_dca=0,
-                    tp1_hit=False,
-                    close_reason=f"Bybit sync ({rec['order_type']})",
-                    opened_at=rec["created_time"],
-                    closed_at=rec["updated_time"],
-                    signal_leverage=config.leverage,
-                    equity_at_entry=equity,
-                    equity_at_close=equity,
-                    leverage=config.leverage,
-                    equity_pct_per_trade=config.equity_pct_per_trade,
-                )
-                fill_info = f" ({rec['fill_count']} fills)" if rec.get("fill_count", 1) > 1 else ""
+                # Not tracked and not in DB → queue for batch save
+                if equity is None:
+                    equity = bybit.get_equity() or 0
+                queued[rec.symbol].append((rec.created_time, rec.updated_time))
+                new_recs.append(rec)
+                new_trades.append({
+                    "trade_id": f"bybit_{rec.symbol}_{rec.side}_{int(rec.created_time)}",
+                    "symbol": rec.symbol,
+                    "side": rec.side,
+                    "entry_price": rec.entry_price,
+                    "avg_price": rec.entry_price,
+                    "close_price": rec.exit_price,
+                    "total_qty": rec.qty,
+                    "total_margin": rec.qty * rec.entry_price / config.leverage,
+                    "realized_pnl": rec.closed_pnl,
+                    "max_dca": 0,
+                    "tp1_hit": False,
+                    "close_reason": f"Bybit sync ({rec.order_type})",
+                    "opened_at": rec.created_time,
+                    "closed_at": rec.updated_time,
+                    "signal_leverage": config.leverage,
+                    "equity_at_entry": equity,
+                    "equity_at_close": equity,
+                    "leverage": config.leverage,
+                    "equity_pct_per_trade": config.equity_pct_per_trade,
+                })
+
+            if not new_trades:
+                continue
+
+            # One transaction + executemany for the whole cycle
+            if not db.save_trades_many(new_trades):
+                continue
+
+            for rec in new_recs:
+                fill_info = f" ({rec.fill_count} fills)" if rec.fill_count > 1 else ""
                 logger.info(
-                    f"BYBIT SYNC: {rec['symbol']} {rec['side'].upper()} | "
-                    f"PnL: ${rec['closed_pnl']:+.4f} | Qty: {rec['qty']}{fill_info} | "
-                    f"Entry: {rec['entry_price']} → Exit: {rec['exit_price']:.4f}"
+                    "BYBIT SYNC: %s %s | "
+                    "PnL: $%+.4f | Qty: %s%s | "
+                    "Entry: %s → Exit: %.4f",
+                    rec.symbol, rec.side.upper(), rec.closed_pnl, rec.qty,
+                    fill_info, rec.entry_price, rec.exit_price,
                 )
 
         except Exception as e:
-            logger.error(f"Bybit trade sync error: {e}", exc_info=True)
+            logger.error("Bybit trade sync error: %s", e, exc_info=True)
             await asyncio.sleep(30)
 
 
@@ -1662,10 +1739,7 @@ async def handle_tg_close(close_cmd: dict):
             success = bybit.close_full(trade, "TG close signal")
             if price:
                 remaining = trade.remaining_qty
-                if trade.side == "long":
-                    pnl = (price - trade.avg_price) * remaining
-                else:
-                    pnl = (trade.avg_price - price) * remaining
+                pnl = trade.side_sign * (price - trade.avg_price) * remaining
                 trade.realized_pnl += pnl
             trade_mgr.close_trade(
                 trade, price or 0, trade.realized_pnl, "TG close signal"
@@ -1689,6 +1763,9 @@ async def lifespan(app: FastAPI):
     db.init_tables()
     zone_mgr.warmup_cache()
 
+    # Close writer must run before anything can close a trade
+    trade_mgr.start_writer()
+
     # Recover active trades from DB before starting monitors
     # (quick load from DB, Bybit reconciliation happens in safety_monitor)
     persisted_count = trade_mgr.load_persisted_trades()
@@ -1723,10 +1800,25 @@ async def lifespan(app: FastAPI):
         sync_task.cancel()
     if tg_listener:
         await tg_listener.stop()
+    trade_mgr.shutdown()
     logger.info("Bot stopped")
 
 
-app = FastAPI(title="Signal DCA Bot v2", lifespan=lifespan)
+app = FastAPI(
+    title="Signal DCA Bot v2",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,  # orjson encoder for all JSON endpoints
+)
+
+_DROP_SLASH = str.maketrans("", "", "/")
+
+
+@functools.lru_cache(maxsize=1024)
+def _normalize_symbol(raw: str) -> str:
+    """Clean TradingView symbol: "HYPEUSDT.P" → "HYPEUSDT", "HYPE/USDT" → "HYPEUSDT"."""
+    s = raw.upper().translate(_DROP_SLASH)
+    i = s.find(".")
+    return s[:i] if i >= 0 else s
 
 
 @app.post("/webhook")
@@ -1741,16 +1833,16 @@ async def webhook(request: Request):
         message = (await request.body()).decode("utf-8")
 
     if not message:
-        return JSONResponse({"status": "error", "reason": "empty message"}, status_code=400)
+        return ORJSONResponse({"status": "error", "reason": "empty message"}, status_code=400)
 
     logger.info(f"Webhook received: {message[:100]}...")
 
     signal = parse_signal(message)
     if signal is None:
-        return JSONResponse({"status": "ignored", "reason": "not a valid signal"})
+        return ORJSONResponse({"status": "ignored", "reason": "not a valid signal"})
 
     result = await add_signal_to_batch(signal)
-    return JSONResponse(result)
+    return ORJSONResponse(result)
 
 
 @app.post("/close/{symbol}")
@@ -1762,10 +1854,7 @@ async def close_position(symbol: str):
             success = bybit.close_full(trade, "Manual close")
             if success and price:
                 qty = trade.remaining_qty if trade.tps_hit > 0 else trade.total_qty
-                if trade.side == "long":
-                    pnl = (price - trade.avg_price) * qty
-                else:
-                    pnl = (trade.avg_price - price) * qty
+                pnl = trade.side_sign * (price - trade.avg_price) * qty
                 trade.realized_pnl += pnl
                 trade_mgr.close_trade(trade, price, trade.realized_pnl, "Manual close")
                 return {"status": "closed", "symbol": symbol, "pnl": f"${pnl:+.2f}"}
@@ -1774,6 +1863,108 @@ async def close_position(symbol: str):
     return {"status": "error", "reason": f"No active trade for {symbol}"}
 
 
+def _trend_switch_already_closed(trade: Trade, success: bool) -> dict:
+    """Result row for a trend-switch victim that price_monitor closed first."""
+    logger.debug(
+        "Neo Cloud close: %s %s already closed by monitor",
+        trade.symbol_display, trade.side.upper(),
+    )
+    return {
+        "trade_id": trade.trade_id,
+        "symbol": trade.symbol_display,
+        "side": trade.side,
+        "pnl": f"${trade.realized_pnl:+.2f} (closed by monitor)",
+        "success": success,
+    }
+
+
+async def _close_on_trend_switch(
+    trade: Trade, direction: str, reason: str, price: float | None
+) -> dict:
+    """Close one trade for a Neo Cloud trend switch.
+
+    Orders for the symbol are already cancelled and `price` is pre-fetched
+    by _close_trend_switch_victims(); the close runs in a worker thread.
+    """
+    # price_monitor may have closed it already (position-closed branch)
+    if trade.status is TradeStatus.CLOSED:
+        return _trend_switch_already_closed(trade, True)
+
+    # PENDING trades: E1 never filled, orders already cancelled → just remove
+    if trade.status is TradeStatus.PENDING or trade.total_qty <= 0:
+        trade_mgr.close_trade(trade, 0, 0, f"{reason} - unfilled")
+        logger.debug(
+            "Neo Cloud cancelled unfilled: %s %s",
+            trade.symbol_display, trade.side.upper(),
+        )
+        return {
+            "trade_id": trade.trade_id,
+            "symbol": trade.symbol_display,
+            "side": trade.side,
+            "pnl": "$0.00 (unfilled)",
+            "success": True,
+        }
+
+    # FILLED trades: close position on exchange
+    # close_full() handles: market close → verify → force-close residual
+    success = await asyncio.to_thread(
+        bybit.close_full, trade, f"Neo Cloud {direction}", cancel_orders=False
+    )
+
+    # price_monitor may have closed it while the thread ran (position-closed
+    # branch) → don't close twice (stats, closed_trades, history row)
+    if trade.status is TradeStatus.CLOSED:
+        return _trend_switch_already_closed(trade, success)
+
+    if price:
+        trade.realized_pnl += trade.side_sign * (price - trade.avg_price) * trade.remaining_qty
+
+    trade_mgr.close_trade(trade, price or 0, trade.realized_pnl, reason)
+    logger.debug(
+        "Neo Cloud closed: %s %s | "
+        "PnL: $%+.2f | success=%s",
+        trade.symbol_display, trade.side.upper(), trade.realized_pnl, success,
+    )
+    return {
+        "trade_id": trade.trade_id,
+        "symbol": trade.symbol_display,
+        "side": trade.side,
+        "pnl": f"${trade.realized_pnl:+.2f}",
+        "success": success,
+    }
+
+
+async def _close_trend_switch_victims(
+    symbol: str, victims: list[Trade], direction: str, reason: str
+) -> list[dict]:
+    """Close all opposing trades of one symbol on a Neo Cloud switch.
+
+    One cancel-all + one ticker fetch for the whole batch (run concurrently),
+    then the per-trade market closes run concurrently.
+    """
+    if not victims:
+        return []
+    _, price = await asyncio.gather(
+        asyncio.to_thread(bybit.cancel_all_orders, symbol),
+        asyncio.to_thread(bybit.get_ticker_price, symbol),
+    )
+    closed = list(await asyncio.gather(
+        *(_close_on_trend_switch(t, direction, reason, price) for t in victims)
+    ))
+
+    # One log record per switch instead of one per trade
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "Neo Cloud %s → %s: closed %d trades\n%s",
+            symbol, direction.upper(), len(closed),
+            "\n".join(
+                f"  {c['symbol']} {c['side'].upper()} PnL={c['pnl']} success={c['success']}"
+                for c in closed
+            ),
+        )
+    return closed
+
+
 @app.post("/signal/trend-switch")
 async def trend_switch(request: Request):
     """Neo Cloud trend switch: close opposing positions on clear reversal.
@@ -1787,8 +1978,6 @@ async def trend_switch(request: Request):
     direction "up"   → close all SHORT positions for that symbol
     direction "down"  → close all LONG positions for that symbol
     """
-    import json as json_lib
-
     raw = await request.body()
     text = raw.decode("utf-8").strip()
 
@@ -1796,22 +1985,26 @@ async def trend_switch(request: Request):
     symbol = ""
     direction = ""
 
-    try:
-        if text.startswith("{"):
-            body = json_lib.loads(text)
-            symbol = body.get("symbol", "").upper().replace("/", "").split(".")[0]
-            direction = body.get("direction", "").lower()
-        else:
-            # Text format: "HYPEUSDT up" or "HYPEUSDT down"
-            parts = text.split()
-            if len(parts) >= 2:
-                symbol = parts[0].upper().replace("/", "").split(".")[0]
-                direction = parts[1].lower()
-    except Exception:
-        pass
+    if text.startswith("{"):
+        try:
+            body = json.loads(text)
+        except json.JSONDecodeError:
+            body = None
+        if not isinstance(body, dict):
+            return ORJSONResponse(
+                {"status": "error", "reason": "invalid JSON"}, status_code=400
+            )
+        symbol = _normalize_symbol(str(body.get("symbol") or ""))
+        direction = str(body.get("direction") or "").lower()
+    else:
+        # Text format: "HYPEUSDT up" or "HYPEUSDT down"
+        parts = text.split()
+        if len(parts) >= 2:
+            symbol = _normalize_symbol(parts[0])
+            direction = parts[1].lower()
 
     if not symbol or direction not in ("up", "down"):
-        return JSONResponse(
+        return ORJSONResponse(
             {"status": "error", "reason": f"Invalid: symbol={symbol}, direction={direction}"},
             status_code=400,
         )
@@ -1824,67 +2017,21 @@ async def trend_switch(request: Request):
     close_side = "short" if direction == "up" else "long"
 
     logger.info(
-        f"Neo Cloud trend switch: {symbol} → {direction.upper()} | "
-        f"Closing {close_side.upper()} positions | Stored in DB"
+        "Neo Cloud trend switch: %s → %s | "
+        "Closing %s positions | Stored in DB",
+        symbol, direction.upper(), close_side.upper(),
     )
 
-    closed = []
-    for trade in list(trade_mgr.active_trades):
-        if trade.symbol != symbol:
-            continue
-        if trade.side != close_side:
-            continue
-
-        # PENDING trades: E1 never filled, just cancel and remove
-        if trade.status == TradeStatus.PENDING or trade.total_qty <= 0:
-            bybit.cancel_all_orders(trade.symbol)
-            trade_mgr.close_trade(
-                trade, 0, 0,
-                f"Neo Cloud trend switch ({direction}) - unfilled"
-            )
-            closed.append({
-                "trade_id": trade.trade_id,
-                "symbol": trade.symbol_display,
-                "side": trade.side,
-                "pnl": "$0.00 (unfilled)",
-            })
-            logger.info(
-                f"Neo Cloud cancelled unfilled: {trade.symbol_display} {trade.side.upper()}"
-            )
-            continue
-
-        # FILLED trades: close position on exchange
-        # close_full() handles: cancel_all → market close → verify → force-close residual
-        price = bybit.get_ticker_price(trade.symbol)
-        success = bybit.close_full(trade, f"Neo Cloud {direction}")
-
-        if price:
-            remaining = trade.remaining_qty
-            if trade.side == "long":
-                pnl = (price - trade.avg_price) * remaining
-            else:
-                pnl = (trade.avg_price - price) * remaining
-            trade.realized_pnl += pnl
-
-        trade_mgr.close_trade(
-            trade, price or 0, trade.realized_pnl,
-            f"Neo Cloud trend switch ({direction})"
-        )
-        closed.append({
-            "trade_id": trade.trade_id,
-            "symbol": trade.symbol_display,
-            "side": trade.side,
-            "pnl": f"${trade.realized_pnl:+.2f}",
-        })
-        logger.info(
-            f"Neo Cloud closed: {trade.symbol_display} {trade.side.upper()} | "
-            f"PnL: ${trade.realized_pnl:+.2f} | success={success}"
-        )
+    # Close all opposing trades (one cancel-all + one ticker for the symbol)
+    victims = trade_mgr.trades_for(symbol, close_side)
+    closed = await _close_trend_switch_victims(
+        symbol, victims, direction, f"Neo Cloud trend switch ({direction})"
+    )
 
     if not closed:
-        logger.info(f"Neo Cloud: no {close_side} trades for {symbol}")
+        logger.info("Neo Cloud: no %s trades for %s", close_side, symbol)
 
-    return JSONResponse({
+    return ORJSONResponse({
         "status": "ok",
         "symbol": symbol,
         "direction": direction,
@@ -1897,7 +2044,11 @@ async def trend_switch(request: Request):
 async def flush():
     """Manually flush the signal buffer."""
     results = await flush_batch()
-    return JSONResponse({"status": "flushed", "results": results or []})
+    return ORJSONResponse({"status": "flushed", "results": results or []})
+
+
+# TradingView @alert() envelope: @alert("<escaped payload>") = <condition>
+_ALERT_RE = re.compile(r'@alert\("(.*?)"\)\s*=', re.DOTALL)
 
 
 @app.post("/zones/push")
@@ -1912,43 +2063,41 @@ async def push_zones(request: Request):
 
     Also accepts legacy format (zone-only, no neo cloud).
     """
-    import json as json_lib
-
     raw = await request.body()
     text = raw.decode("utf-8").strip()
 
     # TradingView sends the full @alert() script text, not just the message.
     # Extract JSON from: @alert("\"symbol\":\"X\",...") = condition
-    if text.startswith("@alert("):
-        # Find content between @alert(" and ") =
-        start = text.find('("')
-        end = text.find('") =')
-        if start != -1 and end != -1:
-            text = text[start + 2:end]  # Extract inner content
-            text = text.replace('\\"', '"')  # Unescape quotes
-            logger.debug(f"Extracted from @alert: {text[:100]}")
+    alert_match = _ALERT_RE.match(text)
+    if alert_match:
+        # Inner content is a JSON string body → one decode unescapes \" etc.
+        inner = alert_match.group(1)
+        try:
+            text = json.loads(f'"{inner}"', strict=False)
+        except json.JSONDecodeError:
+            text = inner.replace('\\"', '"')  # Mixed/unescaped quotes
+        logger.debug(f"Extracted from @alert: {text[:100]}")
 
     # Wrap in braces if missing (TradingView JSON bypass)
     if not text.startswith("{"):
         text = "{" + text + "}"
 
     try:
-        body = json_lib.loads(text)
-    except (json_lib.JSONDecodeError, ValueError):
+        body = json.loads(text)
+    except (json.JSONDecodeError, ValueError):
         logger.warning(f"Zone push: invalid JSON: {text[:200]}")
-        return JSONResponse(
+        return ORJSONResponse(
             {"status": "error", "reason": "invalid JSON"}, status_code=400
         )
 
     raw_symbol = body.get("symbol", "")
     if not raw_symbol or raw_symbol.upper() in ("NAN", "NULL", ""):
-        return JSONResponse(
+        return ORJSONResponse(
             {"status": "error", "reason": "Symbol missing or NaN. LuxAlgo has no {{ticker}} placeholder - hardcode the symbol in your @alert() script, e.g. \"symbol\":\"HYPEUSDT\""},
             status_code=400,
         )
 
-    # Clean symbol: "HYPEUSDT.P" → "HYPEUSDT", "HYPE/USDT" → "HYPEUSDT"
-    symbol_clean = raw_symbol.upper().replace("/", "").split(".")[0]
+    symbol_clean = _normalize_symbol(raw_symbol)
 
     s1 = float(body.get("s1", 0) or 0)
     s2 = float(body.get("s2", 0) or 0)
@@ -2010,58 +2159,17 @@ async def push_zones(request: Request):
             # TREND SWITCH detected → close opposing positions
             close_side = "short" if new_direction == "up" else "long"
             logger.info(
-                f"NEO CLOUD SWITCH: {symbol_clean} {old_direction.upper()} → "
-                f"{new_direction.upper()} | Closing {close_side.upper()} positions"
+                "NEO CLOUD SWITCH: %s %s → "
+                "%s | Closing %s positions",
+                symbol_clean, old_direction.upper(), new_direction.upper(),
+                close_side.upper(),
             )
 
-            closed = []
-            for trade in list(trade_mgr.active_trades):
-                if trade.symbol != symbol_clean or trade.side != close_side:
-                    continue
-
-                # PENDING trades: E1 never filled, just cancel and remove
-                if trade.status == TradeStatus.PENDING or trade.total_qty <= 0:
-                    bybit.cancel_all_orders(trade.symbol)
-                    trade_mgr.close_trade(
-                        trade, 0, 0,
-                        f"Neo Cloud switch ({new_direction}) - unfilled"
-                    )
-                    closed.append({
-                        "trade_id": trade.trade_id,
-                        "side": trade.side,
-                        "pnl": "$0.00 (unfilled)",
-                    })
-                    logger.info(
-                        f"Neo Cloud cancelled unfilled: {trade.symbol_display}"
-                    )
-                    continue
-
-                # FILLED trades: close position on exchange
-                # close_full() handles: cancel_all → market close → verify → force-close residual
-                price = bybit.get_ticker_price(trade.symbol)
-                success = bybit.close_full(trade, f"Neo Cloud {new_direction}")
-
-                if price:
-                    remaining = trade.remaining_qty
-                    if trade.side == "long":
-                        pnl = (price - trade.avg_price) * remaining
-                    else:
-                        pnl = (trade.avg_price - price) * remaining
-                    trade.realized_pnl += pnl
-
-                trade_mgr.close_trade(
-                    trade, price or 0, trade.realized_pnl,
-                    f"Neo Cloud switch ({new_direction})"
-                )
-                closed.append({
-                    "trade_id": trade.trade_id,
-                    "side": trade.side,
-                    "pnl": f"${trade.realized_pnl:+.2f}",
-                })
-                logger.info(
-                    f"Neo Cloud closed: {trade.symbol_display} {trade.side.upper()} | "
-                    f"PnL: ${trade.realized_pnl:+.2f} | success={success}"
-                )
+            victims = trade_mgr.trades_for(symbol_clean, close_side)
+            closed = await _close_trend_switch_victims(
+                symbol_clean, victims, new_direction,
+                f"Neo Cloud switch ({new_direction})",
+            )
 
             neo_result = {
                 "switch": True,
@@ -2078,8 +2186,9 @@ async def push_zones(request: Request):
             }
             if not old_direction:
                 logger.info(
-                    f"Neo Cloud init: {symbol_clean} → {new_direction.upper()} "
-                    f"(lead={neo_lead:.4f}, lag={neo_lag:.4f})"
+                    "Neo Cloud init: %s → %s "
+                    "(lead=%.4f, lag=%.4f)",
+                    symbol_clean, new_direction.upper(), neo_lead, neo_lag,
                 )
 
     result = {
@@ -2090,7 +2199,11 @@ async def push_zones(request: Request):
     if neo_result:
         result["neo_cloud"] = neo_result
 
-    return JSONResponse(result)
+    return ORJSONResponse(result)
+
+
+# LuxAlgo plot keys sent by the discovery alert (p0..p19)
+_PLOT_KEYS = tuple(f"p{i}" for i in range(20))
 
 
 @app.post("/zones/discover")
@@ -2100,32 +2213,29 @@ async def discover_plots(request: Request):
     TradingView alert sends plot_0 through plot_19 + known S1.
     Logs all values so you can identify which index = which zone.
     """
-    import json as json_lib
-
     raw = await request.body()
-    text = raw.decode("utf-8").strip()
 
     try:
-        body = json_lib.loads(text)
-    except (json_lib.JSONDecodeError, ValueError):
-        logger.warning(f"Discover: invalid JSON: {text[:300]}")
-        return JSONResponse(
+        body = orjson.loads(raw)  # parses bytes directly (no decode/strip copies)
+    except orjson.JSONDecodeError:
+        logger.warning(
+            "Discover: invalid JSON: %s", raw[:300].decode("utf-8", "replace")
+        )
+        return ORJSONResponse(
             {"status": "error", "reason": "invalid JSON"}, status_code=400
         )
 
     symbol = body.get("symbol", "?")
     s1_known = body.get("s1", "?")
 
-    # Log all plot values in a readable format
-    logger.info(f"=== PLOT DISCOVERY: {symbol} ===")
-    logger.info(f"  Known S1 = {s1_known}")
+    plot_values = {key: body.get(key, "missing") for key in _PLOT_KEYS}
 
-    plot_values = {}
-    for i in range(20):
-        key = f"p{i}"
-        val = body.get(key, "missing")
-        plot_values[key] = val
-        logger.info(f"  plot_{i} = {val}")
+    # Log all plot values in a readable format (one log record)
+    logger.info("\n".join((
+        f"=== PLOT DISCOVERY: {symbol} ===",
+        f"  Known S1 = {s1_known}",
+        *(f"  plot_{key[1:]} = {val}" for key, val in plot_values.items()),
+    )))
 
     # Try to identify which plots match zone prices
     # S1 is known, so look for values near S1 that could be S2/S3
@@ -2140,7 +2250,7 @@ async def discover_plots(request: Request):
                     matches.append((key, v, pct_diff))
             except (ValueError, TypeError):
                 pass
-        matches.sort(key=lambda x: x[1])
+        matches.sort(key=itemgetter(1))
         logger.info(f"  --- Non-zero values sorted by price ---")
         for key, val, pct in matches:
             label = "SUPPORT?" if val < s1_f else "RESIST?"
@@ -2148,7 +2258,7 @@ async def discover_plots(request: Request):
     except (ValueError, TypeError):
         pass
 
-    return JSONResponse({
+    return ORJSONResponse({
         "status": "ok",
         "symbol": symbol,
         "s1": s1_known,
@@ -2162,7 +2272,12 @@ async def update_zones(symbol: str, request: Request):
 
     JSON body: {"s1": 111.5, "s2": 108.2, "s3": 105.0, "r1": 115.8, "r2": 118.5, "r3": 121.0}
     """
-    body = await request.json()
+    try:
+        body = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        return ORJSONResponse(
+            {"status": "error", "reason": "invalid JSON"}, status_code=400
+        )
     symbol_clean = symbol.upper().replace("/", "")
 
     zones = CoinZones(
@@ -2177,7 +2292,7 @@ async def update_zones(symbol: str, request: Request):
     )
     zone_mgr.update_zones(symbol_clean, zones)
 
-    return JSONResponse({
+    return ORJSONResponse({
         "status": "ok",
         "symbol": symbol_clean,
         "source": zones.source,
@@ -2200,7 +2315,7 @@ async def list_zones():
             "age_min": round(z.age_minutes, 1),
             "valid": z.is_valid,
         }
-    return JSONResponse(result)
+    return ORJSONResponse(result)
 
 
 @app.post("/recovery/reset")
@@ -2213,47 +2328,87 @@ async def recovery_reset():
     count = trade_mgr.active_count
     db.clear_all_active_trades()
     # Also clear in-memory trades (they'll become orphans on next safety check)
-    trade_mgr.trades.clear()
+    trade_mgr.clear()
     logger.warning(f"RECOVERY RESET: cleared {count} active trades from DB + memory")
-    return JSONResponse({
+    return ORJSONResponse({
         "status": "ok",
         "cleared": count,
         "warning": "Trades cleared from bot memory. Positions still open on Bybit!",
     })
 
 
+# /status is polled by the dashboard (and any monitor) → accept slightly stale data.
+# Equity here is display-only; trade sizing always fetches fresh equity.
+STATUS_CACHE_TTL = 1.5     # seconds
+STATUS_EQUITY_TTL = 15.0   # seconds
+_status_cache = {"t": 0.0, "body": None, "etag": ""}  # serialized once per TTL
+_equity_cache = {"t": 0.0, "v": None}
+
+# Config is static for the process lifetime → build the /status block once
+_STATUS_CONFIG = {
+    "leverage": config.leverage,
+    "equity_pct": config.equity_pct_per_trade,
+    "max_trades": config.max_simultaneous_trades,
+    "max_fills_per_batch": config.max_fills_per_batch,
+    "dca_levels": config.max_dca_levels,
+    "dca_mults": config.dca_multipliers[:config.max_dca_levels + 1],
+    "tp_pcts": config.tp_close_pcts,
+    "trail_pct": 100 - sum(config.tp_close_pcts),
+    "trail_cb": config.trailing_callback_pct,
+    "safety_sl_pct": config.safety_sl_pct,
+    "hard_sl_pct": config.hard_sl_pct,
+    "dca_tp_pcts": config.dca_tp_pcts,
+    "dca_trail_cb": config.dca_trail_callback_pct,
+    "zones": config.zone_snap_enabled,
+    "neo_cloud": config.neo_cloud_filter,
+    "testnet": config.bybit_testnet,
+}
+
+
+def _status_equity() -> float:
+    """Equity for the dashboard, refreshed at most every STATUS_EQUITY_TTL."""
+    now = time.monotonic()
+    if _equity_cache["v"] is None or now - _equity_cache["t"] >= STATUS_EQUITY_TTL:
+        _equity_cache["v"] = bybit.get_equity()
+        _equity_cache["t"] = now
+    return _equity_cache["v"]
+
+
+def _status_response(request: Request) -> Response:
+    """Cached /status body, or an empty 304 if the client already has it."""
+    etag = _status_cache["etag"]
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(
+        content=_status_cache["body"],
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
+
+
 @app.get("/status")
-async def status():
-    """Dashboard data as JSON."""
+async def status(request: Request):
+    """Dashboard data as JSON (ETag → unchanged state answers 304)."""
+    now = time.monotonic()
+    if _status_cache["body"] is not None and now - _status_cache["t"] < STATUS_CACHE_TTL:
+        return _status_response(request)
+
     data = trade_mgr.get_dashboard_data()
     data["buffer"] = len(signal_buffer)
 
     try:
-        equity = bybit.get_equity()
+        equity = _status_equity()
         data["equity"] = f"${equity:,.2f}"
     except Exception:
         data["equity"] = "N/A"
 
-    data["config"] = {
-        "leverage": config.leverage,
-        "equity_pct": config.equity_pct_per_trade,
-        "max_trades": config.max_simultaneous_trades,
-        "max_fills_per_batch": config.max_fills_per_batch,
-        "dca_levels": config.max_dca_levels,
-        "dca_mults": config.dca_multipliers[:config.max_dca_levels + 1],
-        "tp_pcts": config.tp_close_pcts,
-        "trail_pct": 100 - sum(config.tp_close_pcts),
-        "trail_cb": config.trailing_callback_pct,
-        "safety_sl_pct": config.safety_sl_pct,
-        "hard_sl_pct": config.hard_sl_pct,
-        "dca_tp_pcts": config.dca_tp_pcts,
-        "dca_trail_cb": config.dca_trail_callback_pct,
-        "zones": config.zone_snap_enabled,
-        "neo_cloud": config.neo_cloud_filter,
-        "testnet": config.bybit_testnet,
-    }
+    data["config"] = _STATUS_CONFIG
 
-    return JSONResponse(data)
+    body = orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    _status_cache["body"] = body
+    _status_cache["etag"] = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    _status_cache["t"] = now
+    return _status_response(request)
 
 
 @app.get("/trades")
@@ -2261,7 +2416,7 @@ async def trade_history():
     """Recent trade history from DB."""
     trades = db.get_recent_trades(50)
     stats = db.get_trade_stats()
-    return JSONResponse({"stats": stats, "trades": trades})
+    return ORJSONResponse({"stats": stats, "trades": trades})
 
 
 @app.get("/admin/fix-pnl")
@@ -2272,22 +2427,38 @@ async def admin_fix_pnl():
     """
     recent = db.get_recent_trade_ids(days=7)
     if not recent:
-        return JSONResponse({"status": "no trades to fix"})
+        return ORJSONResponse({"status": "no trades to fix"})
+
+    # One paginated Bybit query for the whole window instead of one per trade
+    starts = [t["opened_at"] for t in recent if t["opened_at"]]
+    if not starts:
+        return ORJSONResponse({"status": "no trades to fix"})
+    records = bybit.get_closed_pnl_all(start_time_ms=int(min(starts) * 1000))
+    if records is None:
+        # Partial Bybit history would undercount PnL → don't touch the DB
+        return ORJSONResponse(
+            {"status": "error", "reason": "Bybit closed PnL incomplete"},
+            status_code=502,
+        )
+
+    by_key: dict[tuple[str, str], list[dict]] = defaultdict(list)
+    for r in records:
+        by_key[(r["symbol"], r["side"])].append(r)
 
     results = []
+    updates = []
     for trade_rec in recent:
         symbol = trade_rec["symbol"]
         side = trade_rec["side"]
-        start_ms = int(trade_rec["opened_at"] * 1000) if trade_rec["opened_at"] else 0
+        opened_at = trade_rec["opened_at"]
 
-        if start_ms == 0:
+        if not opened_at:
             continue
 
-        # Query Bybit for closed PnL records
-        records = bybit.get_closed_pnl(limit=50, start_time_ms=start_ms)
+        # Same match as before: all (symbol, side) closes since the trade opened
         matching = [
-            r for r in records
-            if r["symbol"] == symbol and r["side"] == side
+            r for r in by_key.get((symbol, side), ())
+            if r["created_time"] >= opened_at
         ]
 
         if not matching:
@@ -2300,24 +2471,28 @@ async def admin_fix_pnl():
         if abs(diff) < 0.001:
             continue  # Already correct
 
-        # Update DB with Bybit PnL
-        updated = db.update_trade_pnl(
-            trade_id=trade_rec["trade_id"],
-            realized_pnl=bybit_pnl,
-            total_margin=trade_rec["total_margin"],
-            equity_at_entry=trade_rec["equity_at_entry"],
-        )
-
+        updates.append((
+            trade_rec["trade_id"], bybit_pnl,
+            trade_rec["total_margin"], trade_rec["equity_at_entry"],
+        ))
         results.append({
             "trade_id": trade_rec["trade_id"],
             "symbol": symbol,
             "old_pnl": round(old_pnl, 4),
             "bybit_pnl": round(bybit_pnl, 4),
             "diff": round(diff, 4),
-            "updated": updated,
         })
 
-    return JSONResponse({
+    # Update DB with Bybit PnL (one transaction → all rows or none)
+    if not db.update_trades_pnl_bulk(updates):
+        return ORJSONResponse({
+            "status": "error",
+            "reason": "DB update failed, nothing fixed",
+            "fixed": 0,
+            "details": results,
+        }, status_code=500)
+
+    return ORJSONResponse({
         "status": "done",
         "fixed": len(results),
         "details": results,
@@ -2328,82 +2503,26 @@ async def admin_fix_pnl():
 async def equity_history():
     """Equity curve data for dashboard chart."""
     history = db.get_equity_history(90)
-    return JSONResponse({"history": history})
+    return ORJSONResponse({"history": history})
+
+
+# Static page, read once at import (identical for every request; the
+# JS polls /status for data). no-cache + ETag: browsers revalidate, so a
+# redeploy shows up immediately, unchanged pages cost an empty 304.
+_DASHBOARD_HTML = (Path(__file__).parent / "dashboard.html").read_bytes()
+_DASHBOARD_ETAG = f'"{hashlib.blake2b(_DASHBOARD_HTML, digest_size=8).hexdigest()}"'
 
 
 @app.get("/", response_class=HTMLResponse)
-async def dashboard():
+async def dashboard(request: Request):
     """HTML dashboard."""
-    return """
-<!DOCTYPE html>
-<html><head>
-<title>Signal DCA Bot v2</title>
-<meta charset="utf-8">
-<meta http-equiv="refresh" content="10">
-<style>
-    body { background: #0d1117; color: #c9d1d9; font-family: monospace; padding: 20px; }
-    h1 { color: #58a6ff; }
-    .card { background: #161b22; border: 1px solid #30363d; border-radius: 8px; padding: 16px; margin: 10px 0; }
-    .green { color: #3fb950; } .red { color: #f85149; } .yellow { color: #d29922; } .blue { color: #58a6ff; }
-    table { width: 100%; border-collapse: collapse; }
-    th, td { text-align: left; padding: 8px; border-bottom: 1px solid #21262d; }
-    th { color: #8b949e; }
-    .status { display: inline-block; padding: 2px 8px; border-radius: 4px; font-size: 12px; }
-    .status-open { background: #0d419d; } .status-dca { background: #9a6700; }
-    .status-trailing { background: #1a7f37; } .status-be_trail { background: #1a7f37; }
-</style>
-</head><body>
-<h1>Signal DCA Bot v2</h1>
-<div id="dashboard">Loading...</div>
-<script>
-async function update() {
-    const res = await fetch('/status');
-    const d = await res.json();
-    let html = '';
-
-    html += '<div class="card">';
-    html += `<b class="blue">Config:</b> ${d.config.leverage}x | ${d.config.equity_pct}% eq/trade | `;
-    html += `Max ${d.config.max_trades} trades | ${d.config.dca_levels} DCA ${JSON.stringify(d.config.dca_mults)} | `;
-    html += `TP: ${d.config.tp_pcts.map((p,i) => 'TP'+(i+1)+'='+p+'%').join(', ')} + Trail ${d.config.trail_pct}% (${d.config.trail_cb}% CB) | Safety SL entry-${d.config.safety_sl_pct}% → DCA SL fill+${d.config.hard_sl_pct}% | `;
-    html += `DCA Exit: ${d.config.dca_tp_pcts ? d.config.dca_tp_pcts.map((p,i) => 'TP'+(i+1)+'='+p+'%').join(', ') : 'N/A'} from avg, trail @${d.config.dca_trail_cb || 1}%CB | `;
-    html += `Neo Cloud: ${d.config.neo_cloud ? 'ON' : 'OFF'} | `;
-    html += `Zones: ${d.config.zones ? 'ON' : 'OFF'} | `;
-    html += d.config.testnet ? '<span class="yellow">TESTNET</span>' : '<span class="red">LIVE</span>';
-    html += ` | Equity: <b>${d.equity}</b>`;
-    html += '</div>';
-
-    html += '<div class="card">';
-    html += `<b class="blue">Stats:</b> Slots: <b>${d.slots}</b> | `;
-    html += `<span class="green">${d.stats.wins}W</span> / <span class="red">${d.stats.losses}L</span> / ${d.stats.breakeven}BE | `;
-    html += `WR: <b>${d.stats.win_rate}</b> | PnL: <b class="${d.stats.total_pnl.includes('-') ? 'red' : 'green'}">${d.stats.total_pnl}</b>`;
-    html += '</div>';
-
-    if (d.active_trades.length > 0) {
-        html += '<div class="card"><b class="blue">Active Trades:</b>';
-        html += '<table><tr><th>Symbol</th><th>Side</th><th>Entry</th><th>Avg</th><th>DCA</th><th>TPs</th><th>SL</th><th>Margin</th><th>Status</th><th>Age</th></tr>';
-        for (const t of d.active_trades) {
-            const sc = t.side === 'long' ? 'green' : 'red';
-            const stc = 'status-' + t.status;
-            html += '<tr>';
-            html += `<td><b>${t.symbol}</b></td>`;
-            html += `<td class="${sc}">${t.side.toUpperCase()}</td>`;
-            html += `<td>${t.entry}</td><td>${t.avg}</td>`;
-            html += `<td>${t.dca}</td><td class="green">${t.tps}</td><td>${t.sl}</td>`;
-            html += `<td>${t.margin}</td>`;
-            html += `<td><span class="status ${stc}">${t.status}</span></td>`;
-            html += `<td>${t.age}</td></tr>`;
-        }
-        html += '</table></div>';
-    } else {
-        html += '<div class="card"><span class="yellow">No active trades</span></div>';
-    }
-
-    document.getElementById('dashboard').innerHTML = html;
-}
-update();
-setInterval(update, 10000);
-</script>
-</body></html>"""
+    if request.headers.get("if-none-match") == _DASHBOARD_ETAG:
+        return Response(status_code=304, headers={"ETag": _DASHBOARD_ETAG})
+    return Response(
+        content=_DASHBOARD_HTML,
+        media_type="text/html",
+        headers={"ETag": _DASHBOARD_ETAG, "Cache-Control": "no-cache"},
+    )
 
 
 # ══════════════════════════════════════════════════════════════════════════
@@ -12,7 +12,9 @@ Setup:
   4. Set TELEGRAM_CHANNEL to channel name, title, or numeric ID
 """
 
+import asyncio
 import logging
+import re
 from telethon import TelegramClient, events
 from telethon.sessions import StringSession
 
@@ -21,6 +23,21 @@ from telegram_parser import parse_signal, parse_close_signal
 
 logger = logging.getLogger("telegram")
 
+# Cheap prefilter: every signal has "Name:", every close has "<COIN>/USDT".
+# Chatter without either never reaches the parsers.
+_SIGNAL_MARKER_RE = re.compile(r"Name:|/USDT", re.IGNORECASE)
+
+
+def _parse_message(text: str) -> tuple[str, object]:
+    """Run all parsers, first match wins → ("signal", Signal) / ("close", dict) / ("", None)."""
+    signal = parse_signal(text)
+    if signal:
+        return "signal", signal
+    close_cmd = parse_close_signal(text)
+    if close_cmd:
+        return "close", close_cmd
+    return "", None
+
 
 class TelegramListener:
     """Listens to a Telegram channel and forwards signals to the bot."""
@@ -32,6 +49,13 @@ class TelegramListener:
         self.client: TelegramClient | None = None
         self._running = False
 
+        # Channel filter parsed once (checked on every message)
+        channel = config.telegram_channel
+        self._channel_id: int | None = (
+            int(channel) if channel and channel.lstrip("-").isdigit() else None
+        )
+        self._channel_lower = channel.lower() if channel else ""
+
     @property
     def is_configured(self) -> bool:
         """Check if Telegram credentials are set."""
@@ -80,13 +104,12 @@ class TelegramListener:
 
     def _match_chat(self, event) -> bool:
         """Check if the message is from the target channel."""
-        channel = self.config.telegram_channel
-        if not channel:
+        if not self._channel_lower:
             return True  # No filter = accept all
 
         # Match by numeric chat ID
-        if channel.lstrip("-").isdigit():
-            return str(event.chat_id) == str(channel)
+        if self._channel_id is not None:
+            return event.chat_id == self._channel_id
 
         # Match by title or username
         chat = event.chat
@@ -94,8 +117,8 @@ class TelegramListener:
         username = getattr(chat, "username", "") or ""
 
         return (
-            title.lower() == channel.lower()
-            or username.lower() == channel.lower()
+            title.lower() == self._channel_lower
+            or username.lower() == self._channel_lower
         )
 
     async def _on_message(self, event):
@@ -107,35 +130,46 @@ class TelegramListener:
         if not text:
             return
 
-        # Try parsing as a trading signal
-        signal = parse_signal(text)
-        if signal:
+        if not _SIGNAL_MARKER_RE.search(text):
+            self._log_not_signal(text)
+            return
+
+        # Parse in a worker thread (one hop for all parsers) → event loop
+        # keeps serving Bybit I/O while a burst of messages is parsed
+        kind, payload = await asyncio.to_thread(_parse_message, text)
+
+        if kind == "signal":
+            signal = payload
             logger.info(
-                f"TG Signal: {signal.side.upper()} {signal.symbol_display} "
-                f"@ {signal.entry_price} (Lev: {signal.signal_leverage}x)"
+                "TG Signal: %s %s "
+                "@ %s (Lev: %sx)",
+                signal.side.upper(), signal.symbol_display, signal.entry_price,
+                signal.signal_leverage,
             )
             if self.on_signal:
                 try:
                     result = await self.on_signal(signal)
-                    logger.info(f"Signal result: {result}")
+                    logger.info("Signal result: %s", result)
                 except Exception as e:
-                    logger.error(f"Error processing signal: {e}", exc_info=True)
+                    logger.error("Error processing signal: %s", e, exc_info=True)
             return
 
-        # Try parsing as a close signal
-        close_cmd = parse_close_signal(text)
-        if close_cmd:
-            logger.info(f"TG Close: {close_cmd['symbol_display']}")
+        if kind == "close":
+            close_cmd = payload
+            logger.info("TG Close: %s", close_cmd['symbol_display'])
             if self.on_close:
                 try:
                     await self.on_close(close_cmd)
                 except Exception as e:
-                    logger.error(f"Error processing close: {e}", exc_info=True)
+                    logger.error("Error processing close: %s", e, exc_info=True)
             return
 
-        # Not a signal - log for visibility (truncate long messages)
-        preview = text[:80].replace("\n", " ")
-        logger.info(f"TG msg (not signal): {preview}...")
+        self._log_not_signal(text)
+
+    @staticmethod
+    def _log_not_signal(text: str):
+        """Not a signal - log for visibility (truncate long messages)."""
+        logger.info("TG msg (not signal): %s...", text[:80].replace("\n", " "))
 
 
 def generate_session():
@@ -29,8 +29,19 @@ from dataclasses import dataclass, field
 
 logger = logging.getLogger(__name__)
 
-
-@dataclass
+# ── Precompiled patterns (run on every channel message) ──
+_SIDE_SHORT_RE = re.compile(r"🔴\s*Short|Short\s*$", re.MULTILINE | re.IGNORECASE)
+_SIDE_LONG_RE = re.compile(r"🟢\s*Long|Long\s*$", re.MULTILINE | re.IGNORECASE)
+_SYMBOL_RE = re.compile(r"Name:\s*(\S+)")
+_LEV_RE = re.compile(r"Cross\s*\((\d+(?:\.\d+)?)X\)", re.IGNORECASE)
+_ENTRY_RE = re.compile(r"Entry\s*price\s*\(?USDT\)?\s*:\s*\n?\s*([\d.]+)", re.IGNORECASE)
+_TARGETS_ANCHOR_RE = re.compile(r"target", re.IGNORECASE)
+_TARGET_RE = re.compile(r"(\d+)\)\s*([\d.]+)")
+_CLOSE_RE = re.compile(r"(?:Close|Cancel|Schliessen)\s+(\S+/USDT)", re.IGNORECASE)
+_CLOSE_KEYWORDS = frozenset(("close", "cancel", "schliessen"))
+
+
+@dataclass(slots=True)
 class Signal:
     """Parsed trading signal from Telegram."""
     side: str           # "long" or "short"
@@ -40,6 +51,7 @@ class Signal:
     targets: list[float] = field(default_factory=list)
     signal_leverage: int = 50  # Original signal leverage (we override with our own)
     raw_message: str = ""
+    _tp_pcts: list[float] | None = field(default=None, init=False, repr=False, compare=False)
 
     @property
     def tp1_pct(self) -> float:
@@ -53,15 +65,12 @@ class Signal:
 
     @property
     def tp_pcts(self) -> list[float]:
-        """All TP distances from entry in %."""
-        result = []
-        for t in self.targets:
-            if self.side == "long":
-                pct = (t - self.entry_price) / self.entry_price * 100
-            else:
-                pct = (self.entry_price - t) / self.entry_price * 100
-            result.append(round(pct, 2))
-        return result
+        """All TP distances from entry in % (computed once, targets never change)."""
+        if self._tp_pcts is None:
+            entry = self.entry_price
+            sign = 1 if self.side == "long" else -1
+            self._tp_pcts = [round(sign * (t - entry) / entry * 100, 2) for t in self.targets]
+        return self._tp_pcts
 
 
 def parse_signal(message: str) -> Signal | None:
@@ -77,16 +86,16 @@ def parse_signal(message: str) -> Signal | None:
 
     # ── Detect side ──
     side = None
-    if re.search(r"🔴\s*Short|Short\s*$", text, re.MULTILINE | re.IGNORECASE):
+    if _SIDE_SHORT_RE.search(text):
         side = "short"
-    elif re.search(r"🟢\s*Long|Long\s*$", text, re.MULTILINE | re.IGNORECASE):
+    elif _SIDE_LONG_RE.search(text):
         side = "long"
 
     if side is None:
         return None
 
     # ── Extract symbol ──
-    symbol_match = re.search(r"Name:\s*(\S+)", text)
+    symbol_match = _SYMBOL_RE.search(text)
     if not symbol_match:
         return None
     symbol_display = symbol_match.group(1).strip()
@@ -94,15 +103,11 @@ def parse_signal(message: str) -> Signal | None:
     symbol = symbol_display.replace("/", "")
 
     # ── Extract leverage ──
-    lev_match = re.search(r"Cross\s*\((\d+(?:\.\d+)?)X\)", text, re.IGNORECASE)
+    lev_match = _LEV_RE.search(text)
     signal_leverage = int(float(lev_match.group(1))) if lev_match else 50
 
     # ── Extract entry price ──
-    entry_match = re.search(
-        r"Entry\s*price\s*\(?USDT\)?\s*:\s*\n?\s*([\d.]+)",
-        text,
-        re.IGNORECASE
-    )
+    entry_match = _ENTRY_RE.search(text)
     if not entry_match:
         return None
     entry_price = float(entry_match.group(1))
@@ -111,11 +116,10 @@ def parse_signal(message: str) -> Signal | None:
         return None
 
     # ── Extract targets ──
+    # Scan from the first "Target" on (no lowercased copy / slice of the text)
     targets = []
-    target_pattern = re.findall(
-        r"(\d+)\)\s*([\d.]+)",
-        text[text.lower().find("target"):]
-    ) if "target" in text.lower() else []
+    anchor = _TARGETS_ANCHOR_RE.search(text)
+    target_pattern = _TARGET_RE.findall(text, anchor.start()) if anchor else []
 
     for _, price_str in target_pattern:
         try:
@@ -126,15 +130,15 @@ def parse_signal(message: str) -> Signal | None:
             continue
 
     if not targets:
-        logger.warning(f"No targets found in signal for {symbol_display}")
+        logger.warning("No targets found in signal for %s", symbol_display)
         return None
 
     # ── Validate signal makes sense ──
     if side == "long" and targets[0] <= entry_price:
-        logger.warning(f"Long signal but TP1 <= entry: {symbol_display}")
+        logger.warning("Long signal but TP1 <= entry: %s", symbol_display)
         return None
     if side == "short" and targets[0] >= entry_price:
-        logger.warning(f"Short signal but TP1 >= entry: {symbol_display}")
+        logger.warning("Short signal but TP1 >= entry: %s", symbol_display)
         return None
 
     signal = Signal(
@@ -148,8 +152,9 @@ def parse_signal(message: str) -> Signal | None:
     )
 
     logger.info(
-        f"Parsed signal: {side.upper()} {symbol_display} @ {entry_price} "
-        f"| TPs: {signal.tp_pcts}% | Signal Lev: {signal_leverage}x"
+        "Parsed signal: %s %s @ %s "
+        "| TPs: %s%% | Signal Lev: %sx",
+        side.upper(), symbol_display, entry_price, signal.tp_pcts, signal_leverage,
     )
 
     return signal
@@ -164,15 +169,18 @@ def parse_close_signal(message: str) -> dict | None:
     """
     text = message.strip()
 
-    close_match = re.search(
-        r"(?:Close|Cancel|Schliessen)\s+(\S+/USDT)",
-        text,
-        re.IGNORECASE
-    )
-    if not close_match:
-        return None
+    # Fast path: plain "KEYWORD COIN/USDT ..." (same result as the regex)
+    parts = text.split(None, 2)
+    if (len(parts) >= 2 and parts[0].lower() in _CLOSE_KEYWORDS
+            and len(parts[1]) > 5 and parts[1][-5:].upper() == "/USDT"):
+        symbol_display = parts[1]
+    else:
+        # Decorated messages (emoji / prefix text) → regex search
+        close_match = _CLOSE_RE.search(text)
+        if not close_match:
+            return None
+        symbol_display = close_match.group(1)
 
-    symbol_display = close_match.group(1)
     symbol = symbol_display.replace("/", "")
 
     return {
@@ -0,0 +1,40 @@
+"""Bybit sync dedupe rules (pure, no DB needed)."""
+
+import database as db
+
+
+def _dedupe(records):
+    """Mirror of the in-cycle dedupe in main.bybit_trade_sync()."""
+    queued, kept = {}, []
+    for symbol, created, updated in records:
+        if any(db.sync_record_covered(created, updated, o, c)
+               for o, c in queued.get(symbol, ())):
+            continue
+        queued.setdefault(symbol, []).append((created, updated))
+        kept.append((symbol, created, updated))
+    return kept
+
+
+def test_near_identical_records_in_one_batch_saved_once():
+    # Partial fills of one close, a few seconds apart
+    recs = [
+        ("BTCUSDT", 1_700_000_000.0, 1_700_003_600.0),
+        ("BTCUSDT", 1_700_000_004.0, 1_700_003_603.0),
+    ]
+    assert _dedupe(recs) == recs[:1]
+
+
+def test_distinct_trades_and_symbols_kept():
+    recs = [
+        ("BTCUSDT", 1_700_000_000.0, 1_700_003_600.0),
+        ("BTCUSDT", 1_700_010_000.0, 1_700_013_600.0),  # later, separate trade
+        ("ETHUSDT", 1_700_000_000.0, 1_700_003_600.0),  # same times, other coin
+    ]
+    assert _dedupe(recs) == recs
+
+
+def test_record_inside_trade_lifetime_covered():
+    # TP2 close event inside an already queued trade's open→close window
+    assert db.sync_record_covered(
+        1_700_001_800.0, 1_700_001_900.0, 1_700_000_000.0, 1_700_003_600.0
+    )
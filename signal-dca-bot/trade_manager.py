@@ -25,14 +25,23 @@ Exit Logic (with Scale-In at TP2):
 import time
 import logging
 import json
+import queue
+import threading
+from collections import deque
 from dataclasses import dataclass, field
 from enum import Enum
+from itertools import islice
 from config import BotConfig
 from telegram_parser import Signal
 import database as db
 
 logger = logging.getLogger(__name__)
 
+# Closed trades are written by a background thread, up to this many per
+# transaction (a Neo Cloud switch burst lands in one commit)
+WRITER_BATCH = 64
+WRITER_RETRY_S = 5.0      # backoff before re-writing a failed close batch
+
 
 class TradeStatus(str, Enum):
     PENDING = "pending"     # E1 limit order placed, waiting for fill
@@ -43,7 +52,7 @@ class TradeStatus(str, Enum):
     CLOSED = "closed"       # Fully closed
 
 
-@dataclass
+@dataclass(slots=True)
 class DCALevel:
     """Tracks a single DCA entry level."""
     level: int          # 0=E1, 1=DCA1, 2=DCA2, 3=DCA3
@@ -54,7 +63,7 @@ class DCALevel:
     order_id: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class Trade:
     """Represents an active trade with all its DCA levels."""
     # Identity
@@ -128,8 +137,9 @@ class Trade:
     equity_at_entry: float = 0.0
 
     @property
-    def is_active(self) -> bool:
-        return self.status != TradeStatus.CLOSED
+    def side_sign(self) -> int:
+        """+1 long / -1 short → one formula for both sides."""
+        return 1 if self.side == "long" else -1
 
     @property
     def remaining_qty(self) -> float:
@@ -138,9 +148,13 @@ class Trade:
 
     @property
     def age_hours(self) -> float:
+        return self.age_hours_at(time.time())
+
+    def age_hours_at(self, now: float) -> float:
+        """age_hours against a caller-supplied clock (one time() per batch)."""
         if self.opened_at == 0:
             return 0
-        end = self.closed_at if self.closed_at > 0 else time.time()
+        end = self.closed_at if self.closed_at > 0 else now
         return (end - self.opened_at) / 3600
 
 
@@ -263,15 +277,27 @@ class TradeManager:
 
     def __init__(self, config: BotConfig):
         self.config = config
-        self.trades: dict[str, Trade] = {}  # trade_id → Trade
-        self.closed_trades: list[Trade] = []
+        # trade_id → Trade, ACTIVE trades only: close_trade() is the only place
+        # that sets CLOSED and it removes the trade in the same step
+        self.trades: dict[str, Trade] = {}
+        # (symbol, side) → trades; kept in sync with self.trades
+        self._by_symbol_side: dict[tuple[str, str], list[Trade]] = {}
+        # Recent closed trades only (ring buffer); all-time stats are the running
+        # totals below, full history is in the trades table
+        self.closed_trades: deque[Trade] = deque(maxlen=config.closed_history_size)
         self._trade_counter = 0
+        # Close writes: (save_trade() kwargs or None, trade_id), None = stop.
+        # Drained off the event loop by _writer_loop on its own DB connection,
+        # started from the app lifespan via start_writer().
+        self._write_q: queue.Queue = queue.Queue()
+        self._writer: threading.Thread | None = None
 
         # Stats
         self.total_wins = 0
         self.total_losses = 0
         self.total_breakeven = 0
         self.total_pnl = 0.0
+        self._stats = self._build_stats()  # dashboard block, rebuilt on change only
 
     # ── Persistence ──
 
@@ -286,10 +312,6 @@ class TradeManager:
             state_json=state,
         )
 
-    def remove_persisted_trade(self, trade_id: str) -> None:
-        """Remove trade from active_trades DB (trade closed)."""
-        db.delete_active_trade(trade_id)
-
     def load_persisted_trades(self) -> int:
         """Load active trades from DB on startup. Returns count loaded."""
         rows = db.get_all_active_trades()
@@ -298,33 +320,61 @@ class TradeManager:
             try:
                 trade = trade_from_dict(row["state"])
                 # Skip if already closed (shouldn't happen, but safe)
-                if trade.status == TradeStatus.CLOSED:
+                if trade.status is TradeStatus.CLOSED:
                     db.delete_active_trade(trade.trade_id)
                     continue
-                self.trades[trade.trade_id] = trade
+                self._add(trade)
                 # Update trade counter to avoid ID collisions
                 self._trade_counter = max(self._trade_counter, loaded + 1)
                 loaded += 1
                 logger.info(
-                    f"Recovered trade: {trade.symbol_display} {trade.side.upper()} | "
-                    f"Status: {trade.status.value} | Avg: {trade.avg_price:.4f} | "
-                    f"TPs: {trade.tps_hit}/{len(trade.tp_prices)} | "
-                    f"DCA: {trade.current_dca}/{trade.max_dca} | "
-                    f"SL: {trade.hard_sl_price:.4f}"
+                    "Recovered trade: %s %s | "
+                    "Status: %s | Avg: %.4f | "
+                    "TPs: %s/%s | "
+                    "DCA: %s/%s | "
+                    "SL: %.4f",
+                    trade.symbol_display, trade.side.upper(), trade.status.value,
+                    trade.avg_price, trade.tps_hit, len(trade.tp_prices), trade.current_dca,
+                    trade.max_dca, trade.hard_sl_price,
                 )
             except Exception as e:
-                logger.error(f"Failed to recover trade {row['trade_id']}: {e}")
+                logger.error("Failed to recover trade %s: %s", row['trade_id'], e)
         if loaded:
-            logger.info(f"Trade recovery: {loaded} trades restored from DB")
+            logger.info("Trade recovery: %s trades restored from DB", loaded)
         return loaded
 
+    def _add(self, trade: Trade) -> None:
+        self.trades[trade.trade_id] = trade
+        self._by_symbol_side.setdefault((trade.symbol, trade.side), []).append(trade)
+
+    def _remove(self, trade: Trade) -> None:
+        if self.trades.pop(trade.trade_id, None) is None:
+            return
+        key = (trade.symbol, trade.side)
+        # Identity compare: dataclass __eq__ would compare every field
+        bucket = [t for t in self._by_symbol_side.get(key, ()) if t is not trade]
+        if bucket:
+            self._by_symbol_side[key] = bucket
+        else:
+            self._by_symbol_side.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all in-memory trades (recovery reset)."""
+        self.trades.clear()
+        self._by_symbol_side.clear()
+
+    def trades_for(self, symbol: str, side: str) -> list[Trade]:
+        """Active trades for (symbol, side) → O(1) lookup instead of a full scan."""
+        return list(self._by_symbol_side.get((symbol, side), ()))
+
     @property
     def active_trades(self) -> list[Trade]:
-        return [t for t in self.trades.values() if t.is_active]
+        # Snapshot list: callers close trades while iterating
+        return list(self.trades.values())
 
     @property
     def active_count(self) -> int:
-        return len(self.active_trades)
+        return len(self.trades)
 
     @property
     def has_free_slot(self) -> bool:
@@ -335,18 +385,19 @@ class TradeManager:
         if not self.has_free_slot:
             return False, f"Max {self.config.max_simultaneous_trades} trades reached"
 
-        for t in self.active_trades:
-            if t.symbol == symbol:
-                return False, f"Already in {symbol}"
+        # (symbol, side) index only holds active trades, empty buckets are dropped
+        if (symbol, "long") in self._by_symbol_side or (symbol, "short") in self._by_symbol_side:
+            return False, f"Already in {symbol}"
+
+        # Coin filters (frozensets, default empty → no base symbol needed)
+        blocked, allowed = self.config.blocked_coins, self.config.allowed_coins
+        if blocked or allowed:
+            base = symbol[:-4] if symbol.endswith("USDT") else symbol.replace("USDT", "")
 
-        if self.config.blocked_coins:
-            base = symbol.replace("USDT", "")
-            if base in self.config.blocked_coins:
+            if base in blocked:
                 return False, f"{base} is blocked"
 
-        if self.config.allowed_coins:
-            base = symbol.replace("USDT", "")
-            if base not in self.config.allowed_coins:
+            if allowed and base not in allowed:
                 return False, f"{base} not in allowed list"
 
         return True, "OK"
@@ -354,28 +405,38 @@ class TradeManager:
     def create_trade(self, signal: Signal, equity: float) -> Trade:
         """Create a new trade from a signal."""
         self._trade_counter += 1
-        trade_id = f"{signal.symbol}_{int(time.time())}_{self._trade_counter}"
+        now = time.time()
+        trade_id = f"{signal.symbol}_{int(now)}_{self._trade_counter}"
+
+        cfg = self.config
+        entry, side = signal.entry_price, signal.side
 
         # Fixed position sizing: 5% equity, 20x leverage
-        total_budget = self.config.trade_budget(equity)
-        base_margin = total_budget / self.config.sum_multipliers
+        total_budget = cfg.trade_budget(equity)
+        base_margin = total_budget / cfg.sum_multipliers
+        base_notional = base_margin * cfg.leverage  # loop-invariant
 
         # Calculate DCA levels
         dca_levels = []
 
-        for i in range(self.config.max_dca_levels + 1):
-            price = self.config.dca_price(signal.entry_price, i, signal.side)
-            margin = base_margin * self.config.dca_multipliers[i]
-            qty = margin * self.config.leverage / price
-
-            level = DCALevel(
+        mults = cfg.dca_multipliers[:cfg.max_dca_levels + 1]
+        factors = cfg.dca_long_factors if side == "long" else cfg.dca_short_factors
+        for i, (mult, factor) in enumerate(zip(mults, factors)):
+            price = entry * factor
+            dca_levels.append(DCALevel(
                 level=i,
                 price=price,
-                qty=qty,
-                margin=margin,
+                qty=base_notional * mult / price,
+                margin=base_margin * mult,
                 filled=False,
+            ))
+        # One level per entry (E1 + max_dca); a short config must fail loudly
+        # (assert would vanish under -O)
+        if len(dca_levels) != cfg.max_dca_levels + 1:
+            raise ValueError(
+                f"dca_multipliers/factors shorter than max_dca_levels + 1 "
+                f"({len(dca_levels)} < {cfg.max_dca_levels + 1})"
             )
-            dca_levels.append(level)
 
         initial_status = (
             TradeStatus.PENDING if self.config.e1_limit_order
@@ -383,8 +444,8 @@ class TradeManager:
         )
 
         # Setup Multi-TP from signal targets
-        tp_close_pcts = list(self.config.tp_close_pcts)
-        tp_prices = signal.targets[:len(tp_close_pcts)]
+        tp_prices = signal.targets[:len(cfg.tp_close_pcts)]
+        tp_close_pcts = cfg.tp_close_pcts[:len(tp_prices)]  # slice = fresh per-trade list
         tp_filled = [False] * len(tp_prices)
         tp_order_ids = [""] * len(tp_prices)
         # tp_close_qtys calculated when TPs are placed (after E1 fills, qty confirmed)
@@ -399,28 +460,31 @@ class TradeManager:
             leverage=self.config.leverage,
             dca_levels=dca_levels,
             status=initial_status,
-            total_qty=0 if initial_status == TradeStatus.PENDING else dca_levels[0].qty,
-            total_margin=0 if initial_status == TradeStatus.PENDING else dca_levels[0].margin,
+            total_qty=0 if initial_status is TradeStatus.PENDING else dca_levels[0].qty,
+            total_margin=0 if initial_status is TradeStatus.PENDING else dca_levels[0].margin,
             avg_price=signal.entry_price,
             current_dca=0,
             max_dca=self.config.max_dca_levels,
             tp_prices=tp_prices,
             tp_order_ids=tp_order_ids,
             tp_filled=tp_filled,
-            tp_close_pcts=tp_close_pcts[:len(tp_prices)],
-            opened_at=time.time(),
+            tp_close_pcts=tp_close_pcts,
+            opened_at=now,
             equity_at_entry=equity,
         )
 
-        self.trades[trade_id] = trade
+        self._add(trade)
 
-        tp_pct_str = " / ".join(f"TP{i+1}={p}%" for i, p in enumerate(trade.tp_close_pcts))
-        logger.info(
-            f"Trade created: {trade.trade_id} | {signal.side.upper()} "
-            f"{signal.symbol_display} @ {signal.entry_price} | "
-            f"E1: {dca_levels[0].qty:.6f} coins, ${dca_levels[0].margin:.2f} margin | "
-            f"TPs: {tp_pct_str} | Targets: {tp_prices}"
-        )
+        if logger.isEnabledFor(logging.INFO):
+            tp_pct_str = " / ".join(f"TP{i+1}={p}%" for i, p in enumerate(trade.tp_close_pcts))
+            logger.info(
+                "Trade created: %s | %s "
+                "%s @ %s | "
+                "E1: %.6f coins, $%.2f margin | "
+                "TPs: %s | Targets: %s",
+                trade.trade_id, signal.side.upper(), signal.symbol_display, signal.entry_price,
+                dca_levels[0].qty, dca_levels[0].margin, tp_pct_str, tp_prices,
+            )
 
         return trade
 
@@ -430,7 +494,12 @@ class TradeManager:
 
     def fill_dca(self, trade: Trade, level: int, fill_price: float) -> None:
         """Record a DCA level as filled. Activates Hard SL."""
-        if level > len(trade.dca_levels) - 1:
+        # Recovered trades come from DB rows and may carry fewer levels
+        if level >= len(trade.dca_levels):
+            logger.warning(
+                "fill_dca: %s has no DCA level %d (%d levels)",
+                trade.trade_id, level, len(trade.dca_levels),
+            )
             return
 
         dca = trade.dca_levels[level]
@@ -441,12 +510,11 @@ class TradeManager:
         actual_qty = dca.margin * trade.leverage / fill_price
         dca.qty = actual_qty
 
-        # Update weighted average
-        old_cost = trade.avg_price * trade.total_qty
-        new_cost = fill_price * actual_qty
+        # Update weighted average incrementally: avg += (fill - avg) * w / W
+        # (no cost re-derivation from the rounded avg, one mul + one div)
         trade.total_qty += actual_qty
         trade.total_margin += dca.margin
-        trade.avg_price = (old_cost + new_cost) / trade.total_qty
+        trade.avg_price += (fill_price - trade.avg_price) * actual_qty / trade.total_qty
         trade.current_dca = level
 
         # Enter DCA mode
@@ -458,9 +526,11 @@ class TradeManager:
         self._update_hard_sl(trade)
 
         logger.info(
-            f"DCA{level} filled: {trade.symbol_display} @ {fill_price:.4f} | "
-            f"New avg: {trade.avg_price:.4f} | Margin: ${trade.total_margin:.2f} | "
-            f"Hard SL: {trade.hard_sl_price:.4f} | DCA {level}/{trade.max_dca}"
+            "DCA%s filled: %s @ %.4f | "
+            "New avg: %.4f | Margin: $%.2f | "
+            "Hard SL: %.4f | DCA %s/%s",
+            level, trade.symbol_display, fill_price, trade.avg_price, trade.total_margin,
+            trade.hard_sl_price, level, trade.max_dca,
         )
 
     def _update_hard_sl(self, trade: Trade) -> None:
@@ -470,29 +540,19 @@ class TradeManager:
         This prevents SL from being above current price when DCA is deep.
         (With avg-3%, DCA deeper than -8.5% would put SL above fill price!)
         """
-        sl_pct = self.config.hard_sl_pct / 100
-
-        # Find the deepest filled DCA price
-        deepest_fill = None
-        for dca in trade.dca_levels[1:]:
-            if dca.filled and dca.price > 0:
-                if trade.side == "long":
-                    deepest_fill = min(deepest_fill, dca.price) if deepest_fill else dca.price
-                else:
-                    deepest_fill = max(deepest_fill, dca.price) if deepest_fill else dca.price
-
-        if deepest_fill:
+        sl_pct = self.config.hard_sl_frac
+        sign = trade.side_sign
+
+        # Deepest filled DCA = furthest against us (lowest long / highest short)
+        fills = [dca.price for dca in islice(trade.dca_levels, 1, None)
+                 if dca.filled and dca.price > 0]
+        if fills:
             # SL at DCA fill price - 3% (always safe, always below fill)
-            if trade.side == "long":
-                trade.hard_sl_price = deepest_fill * (1 - sl_pct)
-            else:
-                trade.hard_sl_price = deepest_fill * (1 + sl_pct)
+            ref = min(fills, key=lambda p: sign * p)
         else:
             # No DCA filled yet (shouldn't happen, but fallback to avg)
-            if trade.side == "long":
-                trade.hard_sl_price = trade.avg_price * (1 - sl_pct)
-            else:
-                trade.hard_sl_price = trade.avg_price * (1 + sl_pct)
+            ref = trade.avg_price
+        trade.hard_sl_price = ref * (1 - sign * sl_pct)
 
     # ══════════════════════════════════════════════════════════════════════
     # ▌ 2/3 PYRAMIDING: Scale-In at TP2
@@ -505,12 +565,9 @@ class TradeManager:
         Called after TP2 fills and market order for scale-in is confirmed.
         New avg is calculated from remaining position + scale-in qty.
         """
-        remaining = trade.remaining_qty
-        old_cost = trade.avg_price * remaining
-        new_cost = fill_price * actual_qty
-        new_total_remaining = remaining + actual_qty
+        new_total_remaining = trade.remaining_qty + actual_qty
 
-        trade.avg_price = (old_cost + new_cost) / new_total_remaining
+        trade.avg_price += (fill_price - trade.avg_price) * actual_qty / new_total_remaining
         trade.total_qty += actual_qty
         trade.total_margin += margin
         trade.scale_in_filled = True
@@ -519,10 +576,12 @@ class TradeManager:
         trade.scale_in_margin = margin
 
         logger.info(
-            f"Scale-in filled: {trade.symbol_display} @ {fill_price:.4f} | "
-            f"+{actual_qty:.6f} coins (${margin:.2f} margin) | "
-            f"New avg: {trade.avg_price:.4f} | "
-            f"Total: {trade.total_qty:.6f} | Remaining: {trade.remaining_qty:.6f}"
+            "Scale-in filled: %s @ %.4f | "
+            "+%.6f coins ($%.2f margin) | "
+            "New avg: %.4f | "
+            "Total: %.6f | Remaining: %.6f",
+            trade.symbol_display, fill_price, actual_qty, margin, trade.avg_price,
+            trade.total_qty, trade.remaining_qty,
         )
 
     def recalc_tps_after_scale_in(self, trade: Trade) -> None:
@@ -551,12 +610,15 @@ class TradeManager:
             share = unfilled_pcts[i] / total_unfilled
             trade.tp_close_qtys[tp_idx] = remaining * share
 
-        logger.info(
-            f"TPs recalculated after scale-in: {trade.symbol_display} | "
-            f"Remaining: {remaining:.6f} | "
-            f"TP qtys: {[f'{q:.6f}' for q in trade.tp_close_qtys]} | "
-            f"Trail: {trail_pct}/{total_unfilled:.0f} share"
-        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "TPs recalculated after scale-in: %s | "
+                "Remaining: %.6f | "
+                "TP qtys: %s | "
+                "Trail: %s/%.0f share",
+                trade.symbol_display, remaining, [f'{q:.6f}' for q in trade.tp_close_qtys],
+                trail_pct, total_unfilled,
+            )
 
     # ══════════════════════════════════════════════════════════════════════
     # ▌ MULTI-TP: Record TP fill (exchange-side)
@@ -567,10 +629,8 @@ class TradeManager:
 
         Called after E1 fills and total_qty is confirmed.
         """
-        trade.tp_close_qtys = []
-        for pct in trade.tp_close_pcts:
-            qty = trade.total_qty * pct / 100
-            trade.tp_close_qtys.append(qty)
+        total_qty = trade.total_qty
+        trade.tp_close_qtys = [total_qty * pct / 100 for pct in trade.tp_close_pcts]
 
     def setup_dca_tps(self, trade: Trade) -> None:
         """Recalculate TP prices and quantities after DCA fill.
@@ -580,13 +640,7 @@ class TradeManager:
         SL after DCA TP1 = exakt avg (kein buffer, bei 0.5% TP1 unnötig).
         """
         # New TP prices based on new avg
-        trade.tp_prices = []
-        for pct in self.config.dca_tp_pcts:
-            if trade.side == "long":
-                tp = trade.avg_price * (1 + pct / 100)
-            else:
-                tp = trade.avg_price * (1 - pct / 100)
-            trade.tp_prices.append(tp)
+        trade.tp_prices = [self._tp_price(trade, pct) for pct in self.config.dca_tp_pcts]
 
         trade.tp_filled = [False] * len(trade.tp_prices)
         trade.tp_order_ids = [""] * len(trade.tp_prices)
@@ -595,16 +649,17 @@ class TradeManager:
         trade.total_tp_closed_qty = 0
 
         # Recalculate close quantities from full position (E1 + DCA)
-        trade.tp_close_qtys = []
-        for pct in trade.tp_close_pcts:
-            qty = trade.total_qty * pct / 100
-            trade.tp_close_qtys.append(qty)
+        total_qty = trade.total_qty
+        trade.tp_close_qtys = [total_qty * pct / 100 for pct in trade.tp_close_pcts]
 
         logger.info(
-            f"DCA TPs set: {trade.symbol_display} | Avg: {trade.avg_price:.4f} | "
-            f"TP1={trade.tp_prices[0]:.4f} ({self.config.dca_tp_pcts[0]}%), "
-            f"TP2={trade.tp_prices[1]:.4f} ({self.config.dca_tp_pcts[1]}%) | "
-            f"Qty: TP1={trade.tp_close_qtys[0]:.2f}, TP2={trade.tp_close_qtys[1]:.2f}"
+            "DCA TPs set: %s | Avg: %.4f | "
+            "TP1=%.4f (%s%%), "
+            "TP2=%.4f (%s%%) | "
+            "Qty: TP1=%.2f, TP2=%.2f",
+            trade.symbol_display, trade.avg_price, trade.tp_prices[0],
+            self.config.dca_tp_pcts[0], trade.tp_prices[1], self.config.dca_tp_pcts[1],
+            trade.tp_close_qtys[0], trade.tp_close_qtys[1],
         )
 
     def record_tp_fill(self, trade: Trade, tp_idx: int,
@@ -617,28 +672,29 @@ class TradeManager:
         trade.tps_hit += 1
         trade.total_tp_closed_qty += closed_qty
 
-        if trade.side == "long":
-            pnl = (fill_price - trade.avg_price) * closed_qty
-        else:
-            pnl = (trade.avg_price - fill_price) * closed_qty
+        pnl = trade.side_sign * (fill_price - trade.avg_price) * closed_qty
         trade.realized_pnl += pnl
 
-        pnl_pct = abs(fill_price - trade.avg_price) / trade.avg_price * 100
-
-        logger.info(
-            f"TP{tp_idx + 1} filled: {trade.symbol_display} | "
-            f"Closed {closed_qty:.6f} @ {fill_price:.4f} | "
-            f"+{pnl_pct:.2f}% | PnL: ${pnl:+.2f} | "
-            f"TPs: {trade.tps_hit}/{len(trade.tp_prices)} | "
-            f"Remaining: {trade.remaining_qty:.6f}"
-        )
+        if logger.isEnabledFor(logging.INFO):
+            # Signed move in our favor (log-only → skipped when INFO is off)
+            pnl_pct = trade.side_sign * (fill_price - trade.avg_price) / trade.avg_price * 100
+            logger.info(
+                "TP%s filled: %s | "
+                "Closed %.6f @ %.4f | "
+                "%+.2f%% | PnL: $%+.2f | "
+                "TPs: %s/%s | "
+                "Remaining: %.6f",
+                tp_idx + 1, trade.symbol_display, closed_qty, fill_price, pnl_pct, pnl,
+                trade.tps_hit, len(trade.tp_prices), trade.remaining_qty,
+            )
 
         # Check if all TPs are filled → enter trailing mode
         if all(trade.tp_filled):
             trade.status = TradeStatus.TRAILING
             logger.info(
-                f"All TPs filled: {trade.symbol_display} | "
-                f"Remaining {trade.remaining_qty:.6f} → trailing"
+                "All TPs filled: %s | "
+                "Remaining %.6f → trailing",
+                trade.symbol_display, trade.remaining_qty,
             )
 
     # ══════════════════════════════════════════════════════════════════════
@@ -655,7 +711,13 @@ class TradeManager:
     # ══════════════════════════════════════════════════════════════════════
 
     def close_trade(self, trade: Trade, close_price: float, pnl: float, reason: str) -> None:
-        """Mark a trade as fully closed."""
+        """Mark a trade as fully closed (no-op if it already is)."""
+        # Concurrent closers (price_monitor vs. Neo Cloud switch) must not
+        # double-count stats, closed_trades or the history write
+        if trade.status is TradeStatus.CLOSED:
+            logger.debug("close_trade: %s already closed, ignoring (%s)", trade.trade_id, reason)
+            return
+
         was_filled = trade.total_qty > 0  # Entry was filled on exchange
 
         trade.status = TradeStatus.CLOSED
@@ -679,20 +741,19 @@ class TradeManager:
             else:
                 self.total_breakeven += 1
             self.total_pnl += pnl
+            self._stats = self._build_stats()
 
         self.closed_trades.append(trade)
-        if trade.trade_id in self.trades:
-            del self.trades[trade.trade_id]
-
-        # Remove from active_trades persistence
-        self.remove_persisted_trade(trade.trade_id)
+        self._remove(trade)
 
-        # Only persist filled trades to DB (skip failed opens / timeouts)
+        # Only persist filled trades to DB (skip failed opens / timeouts);
+        # the active_trades row is dropped either way (see _writer_loop)
         if not was_filled:
-            logger.info(f"Trade skipped DB save (unfilled): {trade.symbol} | {reason}")
+            logger.info("Trade skipped DB save (unfilled): %s | %s", trade.symbol, reason)
+            self._write_q.put_nowait((None, trade.trade_id))
             return
 
-        db.save_trade(
+        self._write_q.put_nowait((dict(
             trade_id=trade.trade_id,
             symbol=trade.symbol,
             side=trade.side,
@@ -713,19 +774,107 @@ class TradeManager:
             tps_hit=trade.tps_hit,
             trail_pnl_pct=round(trade.trail_pnl_pct, 4),
             equity_pct_per_trade=self.config.equity_pct_per_trade,
-        )
+        ), trade.trade_id))
 
+        if not logger.isEnabledFor(logging.INFO):
+            return
         total = self.total_wins + self.total_losses + self.total_breakeven
         wr = self.total_wins / total * 100 if total > 0 else 0
 
         logger.info(
-            f"Trade closed: {trade.symbol_display} {trade.side.upper()} | "
-            f"PnL: ${pnl:+.2f} | Trail: {trade.trail_pnl_pct:+.2f}% | Reason: {reason} | "
-            f"Duration: {trade.age_hours:.1f}h | DCA: {trade.current_dca}/{trade.max_dca} | "
-            f"TPs: {trade.tps_hit}/{len(trade.tp_prices)} | "
-            f"Stats: {self.total_wins}W/{self.total_losses}L/{self.total_breakeven}BE "
-            f"({wr:.0f}% WR) | Total PnL: ${self.total_pnl:+.2f}"
+            "Trade closed: %s %s | "
+            "PnL: $%+.2f | Trail: %+.2f%% | Reason: %s | "
+            "Duration: %.1fh | DCA: %s/%s | "
+            "TPs: %s/%s | "
+            "Stats: %sW/%sL/%sBE "
+            "(%.0f%% WR) | Total PnL: $%+.2f",
+            trade.symbol_display, trade.side.upper(), pnl, trade.trail_pnl_pct, reason,
+            trade.age_hours, trade.current_dca, trade.max_dca, trade.tps_hit,
+            len(trade.tp_prices), self.total_wins, self.total_losses, self.total_breakeven,
+            wr, self.total_pnl,
+        )
+
+    def start_writer(self) -> None:
+        """Start the background close writer (idempotent)."""
+        if self._writer is not None and self._writer.is_alive():
+            return
+        self._writer = threading.Thread(
+            target=self._writer_loop, name="trade-writer", daemon=True
         )
+        self._writer.start()
+
+    def _writer_loop(self) -> None:
+        """Background thread: persist closes, one transaction per drained batch.
+
+        A failed batch is kept and retried (with a fresh connection) until it
+        commits; history insert and active_trades delete share the transaction.
+        Only without a configured DB are batches dropped.
+        """
+        conn = None
+        batch: list = []
+        stop = False
+        while True:
+            if not batch and not stop:
+                item = self._write_q.get()
+                batch = [item]
+                while item is not None and len(batch) < WRITER_BATCH:
+                    try:
+                        item = self._write_q.get_nowait()
+                    except queue.Empty:
+                        break
+                    batch.append(item)
+                if batch[-1] is None:
+                    stop = True
+                    batch.pop()
+                    self._write_q.task_done()
+
+            if batch and db.is_configured():
+                if conn is None or conn.closed:
+                    conn = db.open_connection()
+                saves = [save for save, _ in batch if save is not None]
+                deletes = [trade_id for _, trade_id in batch]
+                if conn is None or not db.save_closed_trades(saves, deletes, conn=conn):
+                    if conn is not None:
+                        conn.close()
+                        conn = None
+                    logger.warning(
+                        "Trade writer: %d close(s) not persisted, retrying in %.0fs",
+                        len(batch), WRITER_RETRY_S,
+                    )
+                    time.sleep(WRITER_RETRY_S)
+                    continue
+
+            for _ in batch:
+                self._write_q.task_done()
+            batch = []
+            if stop:
+                break
+
+        if conn is not None:
+            conn.close()
+
+    def has_pending_writes(self) -> bool:
+        """True while any queued close is not yet committed."""
+        return self._write_q.unfinished_tasks > 0
+
+    def wait_for_writes(self, timeout: float = 5.0) -> bool:
+        """Block until every queued close is committed; False on timeout."""
+        q = self._write_q
+        deadline = time.monotonic() + timeout
+        with q.all_tasks_done:
+            while q.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                q.all_tasks_done.wait(remaining)
+        return True
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Stop the DB writer once all queued closes are written."""
+        if self._writer is None:
+            return
+        self._write_q.put(None)
+        self._writer.join(timeout)
 
     # ══════════════════════════════════════════════════════════════════════
     # ▌ HELPERS
@@ -733,15 +882,11 @@ class TradeManager:
 
     def _tp_price(self, trade: Trade, tp_pct: float) -> float:
         """Calculate TP price from avg."""
-        if trade.side == "long":
-            return trade.avg_price * (1 + tp_pct / 100)
-        else:
-            return trade.avg_price * (1 - tp_pct / 100)
+        return trade.avg_price * (1 + trade.side_sign * tp_pct / 100)
 
     def get_dashboard_data(self) -> dict:
         """Get all data for the dashboard."""
-        active = self.active_trades
-        total = self.total_wins + self.total_losses + self.total_breakeven
+        now = time.time()  # one clock read for every row's age
 
         return {
             "active_trades": [
@@ -754,20 +899,25 @@ class TradeManager:
                     "tps": f"{t.tps_hit}/{len(t.tp_prices)}",
                     "margin": f"${t.total_margin:.2f}",
                     "status": t.status.value,
-                    "age": f"{t.age_hours:.1f}h",
+                    "age": f"{t.age_hours_at(now):.1f}h",
                     "sl": round(t.hard_sl_price, 4) if t.hard_sl_price > 0 else "-",
                     "be_trail": "active" if t.be_trail_active else "-",
                     "scale_in": "filled" if t.scale_in_filled else "-",
                 }
-                for t in active
+                for t in self.trades.values()  # no list copy needed, read-only
             ],
             "slots": f"{self.active_count}/{self.config.max_simultaneous_trades}",
-            "stats": {
-                "wins": self.total_wins,
-                "losses": self.total_losses,
-                "breakeven": self.total_breakeven,
-                "total": total,
-                "win_rate": f"{self.total_wins / total * 100:.1f}%" if total > 0 else "0%",
-                "total_pnl": f"${self.total_pnl:+.2f}",
-            },
+            "stats": self._stats,
+        }
+
+    def _build_stats(self) -> dict:
+        """Stats block for the dashboard; the counters only move in close_trade()."""
+        total = self.total_wins + self.total_losses + self.total_breakeven
+        return {
+            "wins": self.total_wins,
+            "losses": self.total_losses,
+            "breakeven": self.total_breakeven,
+            "total": total,
+            "win_rate": f"{self.total_wins / total * 100:.1f}%" if total > 0 else "0%",
+            "total_pnl": f"${self.total_pnl:+.2f}",
         }